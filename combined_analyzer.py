@@ -0,0 +1,56 @@
+"""Combined Velocity and Volume Analysis Module"""
+import pandas as pd
+import numpy as np
+from typing import Dict, Tuple, Union
+import logging
+from itertools import product
+
+from kernels import velocity_volume_kernel, warmup_variants
+from ohlcv_arrays import OHLCVArrays, as_ohlcv_arrays
+from signal_types import signal_label
+from velocity_analyzer import NEUTRAL_VELOCITY_SIGNAL, VelocitySignal
+from volume_analyzer import NEUTRAL_VOLUME_SIGNAL, VolumeSignal
+
+class CombinedAnalyzer:
+    """Velocity and volume signals from one pass over the last bars
+    Gives the same signals as VelocityAnalyzer and VolumeAnalyzer, with the
+    close tail shared and both computed in a single kernel call.
+    """
+    VELOCITY_STRENGTH = 20.0
+    VOLUME_STRENGTH = 15.0
+
+    def __init__(self, config: Dict):
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        
+        # Compile the fused kernel at startup instead of in the trading loop;
+        # the close tail is a read-only view for float64 frames, the volume
+        # tail a fresh copy, so every combination can occur
+        for close, volume in product(warmup_variants(np.ones(7)), warmup_variants(np.ones(20, dtype=np.int64))):
+            velocity_volume_kernel(close, 1.0, volume, 5, 20)
+
+    def get_signals(self, df: Union[pd.DataFrame, OHLCVArrays]) -> Tuple[VelocitySignal, VolumeSignal]:
+        """Analyze market velocity and volume patterns
+        Short frames give neutral signals; frames without volume data get a
+        neutral volume signal only.
+        """
+        if len(df) < 20:
+            return NEUTRAL_VELOCITY_SIGNAL, NEUTRAL_VOLUME_SIGNAL
+        velocity_signal = VelocitySignal()
+        volume_signal = VolumeSignal()
+        arrs = as_ohlcv_arrays(df)
+        
+        # Last 7 closes for velocity/acceleration, last 20 volumes for the average
+        close = np.ascontiguousarray(arrs.close[-7:], dtype=np.float64)
+        if arrs.tick_volume is not None:
+            volume = np.ascontiguousarray(arrs.tick_volume[-20:], dtype=np.int64)
+        else:
+            volume = np.zeros(20, dtype=np.int64)  # current volume 0 never spikes
+        velocity_code, volume_code = velocity_volume_kernel(close, float(arrs.open[-1]), volume, 5, 20)
+        
+        velocity_signal.signal_type = signal_label(velocity_code)
+        velocity_signal.strength = self.VELOCITY_STRENGTH * abs(velocity_code)
+        volume_signal.signal_type = signal_label(volume_code)
+        volume_signal.strength = self.VOLUME_STRENGTH * abs(volume_code)
+        
+        return velocity_signal, volume_signal
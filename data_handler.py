@@ -5,7 +5,49 @@ import pandas as pd
 import numpy as np
 from typing import Dict, Optional, Union
 import logging
-from datetime import datetime, timedelta
+import time
+import queue
+import threading
+from functools import wraps
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from ohlcv_arrays import OHLCVArrays, price_dtype
+
+@dataclass(slots=True, frozen=True)
+class SymbolInfo:
+    spread: int
+    tick_size: float
+    tick_value: float
+    volume_min: float
+    volume_max: float
+    volume_step: float
+
+@dataclass(slots=True, frozen=True)
+class AccountInfo:
+    balance: float
+    equity: float
+    margin: float
+    free_margin: float
+    profit: float
+
+def ttl_cache(seconds: float):
+    """Cache a method's result on its instance (which must define `_ttl_cache`) for `seconds`
+    Failed lookups (None) are not cached so the next call retries MT5.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self):
+            now = time.monotonic()
+            cached = self._ttl_cache.get(method.__name__)
+            if cached is not None and now - cached[0] < seconds:
+                return cached[1]
+            value = method(self)
+            if value is not None:
+                self._ttl_cache[method.__name__] = (now, value)
+            return value
+        return wrapper
+    return decorator
 
 class DataHandler:
     def __init__(self, config: Dict):
@@ -20,6 +62,13 @@ class DataHandler:
             'H4': mt5.TIMEFRAME_H4,
             'D1': mt5.TIMEFRAME_D1
         }
+        # (monotonic_ts, value) per cached method, see ttl_cache
+        self._ttl_cache = {}
+        # Latest ticks, the time_msc cursor for incremental tick reads and how
+        # many buffered ticks share the cursor's millisecond
+        self._tick_buffer = None
+        self._last_tick_msc = None
+        self._last_tick_dups = 0
 
     def initialize_mt5(self) -> bool:
         """Initialize MT5 connection"""
@@ -36,30 +85,50 @@ class DataHandler:
             if not mt5.symbol_select(self.symbol, True):
                 raise ValueError(f"Symbol {self.symbol} selection failed")
             
-            self.logger.info(f"MT5 initialized successfully. Connected to {self.config['mt5']['server']}")
+            self.logger.info("MT5 initialized successfully. Connected to %s", self.config['mt5']['server'])
             return True
             
         except Exception as e:
-            self.logger.error(f"MT5 initialization error: {e}")
+            self.logger.error("MT5 initialization error: %s", e)
             return False
 
+    def _copy_rates(self, timeframe: Union[str, int], count: int) -> np.ndarray:
+        """Fetch raw MT5 rates (structured array) for specified timeframe"""
+        # Convert timeframe string to MT5 timeframe
+        if isinstance(timeframe, str):
+            if timeframe not in self.timeframe_map:
+                raise ValueError(f"Invalid timeframe: {timeframe}")
+            tf = self.timeframe_map[timeframe]
+        else:
+            tf = timeframe
+        
+        # Request OHLCV data
+        rates = mt5.copy_rates_from_pos(self.symbol, tf, 0, count)
+        if rates is None:
+            raise ValueError(f"Failed to get OHLCV data: {mt5.last_error()}")
+        return rates
+
+    def get_ohlcv_arrays(self, 
+                         timeframe: Union[str, int], 
+                         count: int = 1000) -> Optional[OHLCVArrays]:
+        """Get OHLCV data as NumPy arrays of the MT5 rates, no DataFrame
+        Prices are float32 unless the symbol's tick size needs float64.
+        """
+        try:
+            info = self.get_symbol_info()
+            dtype = price_dtype(info.tick_size if info is not None else None)
+            return OHLCVArrays.from_rates(self._copy_rates(timeframe, count), dtype)
+            
+        except Exception as e:
+            self.logger.error("OHLCV data retrieval error: %s", e)
+            return None
+
     def get_ohlcv_data(self, 
                        timeframe: Union[str, int], 
                        count: int = 1000) -> pd.DataFrame:
         """Get OHLCV data for specified timeframe"""
         try:
-            # Convert timeframe string to MT5 timeframe
-            if isinstance(timeframe, str):
-                if timeframe not in self.timeframe_map:
-                    raise ValueError(f"Invalid timeframe: {timeframe}")
-                tf = self.timeframe_map[timeframe]
-            else:
-                tf = timeframe
-            
-            # Request OHLCV data
-            rates = mt5.copy_rates_from_pos(self.symbol, tf, 0, count)
-            if rates is None:
-                raise ValueError(f"Failed to get OHLCV data: {mt5.last_error()}")
+            rates = self._copy_rates(timeframe, count)
             
             # Convert to DataFrame
             df = pd.DataFrame(rates)
@@ -68,73 +137,224 @@ class DataHandler:
             return df
             
         except Exception as e:
-            self.logger.error(f"OHLCV data retrieval error: {e}")
+            self.logger.error("OHLCV data retrieval error: %s", e)
             return pd.DataFrame()
 
     def get_tick_data(self, count: int = 1000) -> pd.DataFrame:
-        """Get recent tick data"""
+        """Get recent tick data
+        After the first call only ticks from the last one seen onwards are
+        requested; they are appended to a buffer of the latest `count` ticks.
+        The read has no upper time bound, as tick times are in server time
+        and the server may run ahead of UTC.
+        """
         try:
-            ticks = mt5.copy_ticks_from(
-                self.symbol,
-                datetime.now() - timedelta(minutes=5),
-                count,
-                mt5.COPY_TICKS_ALL
-            )
+            if self._tick_buffer is None:
+                ticks = mt5.copy_ticks_from(
+                    self.symbol,
+                    datetime.now() - timedelta(minutes=5),
+                    count,
+                    mt5.COPY_TICKS_ALL
+                )
+            else:
+                ticks = mt5.copy_ticks_from(
+                    self.symbol,
+                    datetime.fromtimestamp(self._last_tick_msc / 1000, tz=timezone.utc),
+                    count,
+                    mt5.COPY_TICKS_ALL
+                )
             if ticks is None:
                 raise ValueError(f"Failed to get tick data: {mt5.last_error()}")
             
-            df = pd.DataFrame(ticks)
+            if self._tick_buffer is None:
+                buffer = ticks[-count:]
+            else:
+                # The read starts on a whole second: drop ticks before the cursor and
+                # as many at the cursor's millisecond as are already buffered, so
+                # later ticks sharing that millisecond are kept
+                msc = ticks['time_msc']
+                first = np.searchsorted(msc, self._last_tick_msc, side='left')
+                at_cursor = np.searchsorted(msc, self._last_tick_msc, side='right') - first
+                new_ticks = ticks[first + min(self._last_tick_dups, at_cursor):]
+                buffer = np.concatenate([self._tick_buffer, new_ticks])[-count:]
+            if len(buffer) > 0:
+                self._tick_buffer = buffer
+                buffer_msc = buffer['time_msc']
+                self._last_tick_msc = int(buffer_msc[-1])
+                self._last_tick_dups = len(buffer) - int(np.searchsorted(buffer_msc, buffer_msc[-1], side='left'))
+            
+            df = pd.DataFrame(buffer)
             df['time'] = pd.to_datetime(df['time'], unit='s')
             
             return df
             
         except Exception as e:
-            self.logger.error(f"Tick data retrieval error: {e}")
+            self.logger.error("Tick data retrieval error: %s", e)
             return pd.DataFrame()
 
-    def get_symbol_info(self) -> Optional[Dict]:
+    @ttl_cache(seconds=1.0)
+    def get_symbol_info(self) -> Optional[SymbolInfo]:
         """Get symbol information"""
         try:
             info = mt5.symbol_info(self.symbol)
             if info is None:
                 raise ValueError(f"Failed to get symbol info: {mt5.last_error()}")
             
-            return {
-                'spread': info.spread,
-                'tick_size': info.trade_tick_size,
-                'tick_value': info.trade_tick_value,
-                'volume_min': info.volume_min,
-                'volume_max': info.volume_max,
-                'volume_step': info.volume_step
-            }
+            return SymbolInfo(
+                spread=info.spread,
+                tick_size=info.trade_tick_size,
+                tick_value=info.trade_tick_value,
+                volume_min=info.volume_min,
+                volume_max=info.volume_max,
+                volume_step=info.volume_step
+            )
             
         except Exception as e:
-            self.logger.error(f"Symbol info retrieval error: {e}")
+            self.logger.error("Symbol info retrieval error: %s", e)
             return None
 
-    def get_account_info(self) -> Optional[Dict]:
+    @ttl_cache(seconds=1.0)
+    def get_account_info(self) -> Optional[AccountInfo]:
         """Get account information"""
         try:
             info = mt5.account_info()
             if info is None:
                 raise ValueError(f"Failed to get account info: {mt5.last_error()}")
             
-            return {
-                'balance': info.balance,
-                'equity': info.equity,
-                'margin': info.margin,
-                'free_margin': info.margin_free,
-                'profit': info.profit
-            }
+            return AccountInfo(
+                balance=info.balance,
+                equity=info.equity,
+                margin=info.margin,
+                free_margin=info.margin_free,
+                profit=info.profit
+            )
             
         except Exception as e:
-            self.logger.error(f"Account info retrieval error: {e}")
+            self.logger.error("Account info retrieval error: %s", e)
             return None
 
+    def get_open_positions_count(self) -> Optional[int]:
+        """Get number of open positions without fetching the positions"""
+        try:
+            total = mt5.positions_total()
+            if total is None:
+                raise ValueError(f"Failed to get positions total: {mt5.last_error()}")
+            
+            return total
+            
+        except Exception as e:
+            self.logger.error("Positions total retrieval error: %s", e)
+            return None
+
+    @ttl_cache(seconds=60.0)
+    def get_daily_trades_count(self) -> Optional[int]:
+        """Get number of trades opened today on the symbol
+        Counts entry deals only, so a closed trade is not counted twice.
+        """
+        try:
+            date_from = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+            # One full day keeps deals in range whatever the server time offset
+            deals = mt5.history_deals_get(date_from, date_from + timedelta(days=1), group=self.symbol)
+            if deals is None:
+                raise ValueError(f"Failed to get deal history: {mt5.last_error()}")
+            
+            return sum(1 for deal in deals if deal.entry == mt5.DEAL_ENTRY_IN)
+            
+        except Exception as e:
+            self.logger.error("Deal history retrieval error: %s", e)
+            return None
+
+    def get_last_tick_msc(self) -> Optional[int]:
+        """Get time of the symbol's latest tick in milliseconds"""
+        try:
+            tick = mt5.symbol_info_tick(self.symbol)
+            if tick is None:
+                raise ValueError(f"Failed to get last tick: {mt5.last_error()}")
+            
+            return tick.time_msc
+            
+        except Exception as e:
+            self.logger.error("Last tick retrieval error: %s", e)
+            return None
+
+    def invalidate_cache(self, *methods: str):
+        """Drop ttl_cache values of the named methods, e.g. after a trade"""
+        for method in methods:
+            self._ttl_cache.pop(method, None)
+
     def shutdown(self):
         """Shutdown MT5 connection"""
         try:
+            self._ttl_cache.clear()
+            self._tick_buffer = None
+            self._last_tick_msc = None
+            self._last_tick_dups = 0
             mt5.shutdown()
             self.logger.info("MT5 connection closed")
         except Exception as e:
-            self.logger.error(f"MT5 shutdown error: {e}")
\ No newline at end of file
+            self.logger.error("MT5 shutdown error: %s", e)
+
+@dataclass
+class MarketSnapshot:
+    m1_data: pd.DataFrame
+    tick_data: pd.DataFrame
+    symbol_info: Optional[SymbolInfo]
+    account_info: Optional[AccountInfo]
+    timestamp: datetime
+
+class MarketDataProducer(threading.Thread):
+    """Background thread fetching a MarketSnapshot on every new tick
+    The last tick time is polled every `interval` seconds; when it changes
+    a snapshot is published and `tick_event` is set. Only the freshest
+    snapshot is kept: when the analysis loop falls behind, the stale one
+    in the queue is replaced.
+    """
+    def __init__(self, data_handler: DataHandler,
+                 m1_count: int = 2000,
+                 tick_count: int = 1000,
+                 interval: float = 0.05):
+        super().__init__(name="market-data", daemon=True)
+        self.data_handler = data_handler
+        self.m1_count = m1_count
+        self.tick_count = tick_count
+        self.interval = interval
+        self.snapshots = queue.Queue(maxsize=1)
+        self.logger = logging.getLogger(__name__)
+        self.tick_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._last_tick_msc = None
+
+    def fetch_snapshot(self) -> MarketSnapshot:
+        """Fetch all per-cycle MT5 data back-to-back"""
+        return MarketSnapshot(
+            m1_data=self.data_handler.get_ohlcv_data('M1', self.m1_count),
+            tick_data=self.data_handler.get_tick_data(self.tick_count),
+            symbol_info=self.data_handler.get_symbol_info(),
+            account_info=self.data_handler.get_account_info(),
+            timestamp=datetime.now(timezone.utc)
+        )
+
+    def publish(self, snapshot: MarketSnapshot):
+        """Put snapshot on the queue, dropping an unconsumed older one"""
+        try:
+            self.snapshots.get_nowait()
+        except queue.Empty:
+            pass
+        self.snapshots.put_nowait(snapshot)
+        self.tick_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                tick_msc = self.data_handler.get_last_tick_msc()
+                if tick_msc is not None and tick_msc != self._last_tick_msc:
+                    self._last_tick_msc = tick_msc
+                    self.publish(self.fetch_snapshot())
+            except Exception as e:
+                self.logger.error("Market data producer error: %s", e)
+            self._stop_event.wait(self.interval)
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the producer and wait for the current fetch to finish"""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
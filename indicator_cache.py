@@ -0,0 +1,38 @@
+"""Shared indicator cache for the analyzers
+Every analyzer receives the same M1 frame per cycle; indicators computed
+on its price arrays are kept until arrays of a different frame come in."""
+
+import threading
+import numpy as np
+import talib
+
+_INDICATORS = {
+    'ema20': lambda close, high, low: talib.EMA(close, timeperiod=20),
+    'ema50': lambda close, high, low: talib.EMA(close, timeperiod=50),
+    'ema200': lambda close, high, low: talib.EMA(close, timeperiod=200),
+    'atr14': lambda close, high, low: talib.ATR(high, low, close, timeperiod=14),
+}
+
+_lock = threading.Lock()
+_cache = {'key': None, 'close': None, 'values': {}}
+
+def _frame_key(close: np.ndarray) -> tuple:
+    """Identity of a frame: close buffer address, length and last close"""
+    return (close.ctypes.data, len(close), close[-1])
+
+def get_indicator(name: str, close: np.ndarray,
+                  high: np.ndarray = None, low: np.ndarray = None):
+    """Get indicator `name` for one frame's float64 arrays, computing it once per frame
+    high/low are only needed by range based indicators (atr14).
+    """
+    key = _frame_key(close)
+    with _lock:
+        if _cache['key'] != key:
+            # Holding the close array keeps its address from being reused while cached
+            _cache['key'] = key
+            _cache['close'] = close
+            _cache['values'] = {}
+        values = _cache['values']
+        if name not in values:
+            values[name] = _INDICATORS[name](close, high, low)
+        return values[name]
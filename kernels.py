@@ -0,0 +1,418 @@
+"""Numba-compiled numeric kernels used by the analyzers
+Signal codes: 1 = BULLISH, -1 = BEARISH, 0 = NEUTRAL"""
+
+import numpy as np
+from numba import njit
+
+def warmup_variants(array):
+    """The array and a read-only view of it, to compile both signatures
+    Column arrays of pandas frames are read-only under copy-on-write and
+    numba types them apart from writable ones, so warming up with writable
+    dummies alone still leaves a compile for the first real frame.
+    """
+    view = array.view()
+    view.flags.writeable = False
+    return array, view
+
+# Liquidity cluster / swing point types
+RESISTANCE = 0
+SUPPORT = 1
+SWING_HIGH = 0
+SWING_LOW = 1
+
+@njit(cache=True, nogil=True)
+def stop_cluster_kernel(close, high, low, highs, lows, sorted_high, sorted_low,
+                        lookback, cluster_range):
+    """Stop cluster score over the last `lookback` bars
+    Strength counts the bars beyond each level via binary search on the
+    pre-sorted high/low arrays.
+    Returns (score, signal_code, prices, types, strengths)
+    """
+    n = len(close)
+    current_price = close[-1]
+    size = 2 * lookback
+    prices = np.empty(size, dtype=np.float64)
+    types = np.empty(size, dtype=np.int8)
+    strengths = np.empty(size, dtype=np.int64)
+
+    count = 0
+    for i in range(n - lookback, n):
+        if high[i] == highs[i]:
+            prices[count] = highs[i]
+            types[count] = RESISTANCE
+            strengths[count] = np.searchsorted(sorted_high, highs[i], side='left')
+            count += 1
+    for i in range(n - lookback, n):
+        if low[i] == lows[i]:
+            prices[count] = lows[i]
+            types[count] = SUPPORT
+            strengths[count] = n - np.searchsorted(sorted_low, lows[i], side='right')
+            count += 1
+
+    score = 0.0
+    code = 0
+    for k in range(count):
+        distance = abs(current_price - prices[k])
+        if distance < cluster_range:
+            score += min(5.0, cluster_range - distance)
+            code = -1 if types[k] == RESISTANCE else 1
+
+    return score, code, prices[:count], types[:count], strengths[:count]
+
+@njit(cache=True, nogil=True)
+def round_number_kernel(close, open_, prices, weights, proximity, reaction_range):
+    """Round number proximity score and latest reaction direction
+    The last level (in grid order) within `proximity` that price has
+    reacted to decides the signal, as in the original per-level loop.
+    Returns (score, signal_code)
+    """
+    current_price = close[-1]
+    score = 0.0
+    code = 0
+    found = False
+    for k in range(len(prices)):
+        distance = abs(current_price - prices[k])
+        if distance < proximity:
+            score += weights[k] * (1 - distance / proximity)
+    for k in range(len(prices) - 1, -1, -1):
+        if found:
+            break
+        if abs(current_price - prices[k]) >= proximity:
+            continue
+        for j in range(len(close) - 1, -1, -1):
+            if abs(close[j] - prices[k]) < reaction_range:
+                code = 1 if close[j] > open_[j] else -1
+                found = True
+                break
+    return score, code
+
+@njit(cache=True, nogil=True)
+def swing_kernel(close, high, low, highs, lows, lookback, min_strength, proximity):
+    """Recent swing point score
+    Returns (score, signal_code, prices, types, strengths)
+    """
+    n = len(close)
+    current_price = close[-1]
+    size = 2 * lookback
+    prices = np.empty(size, dtype=np.float64)
+    types = np.empty(size, dtype=np.int8)
+    strengths = np.empty(size, dtype=np.float64)
+
+    # Suffix extremes of the tail in one backward pass
+    start = n - lookback
+    suffix_low_min = np.empty(lookback, dtype=np.float64)
+    suffix_high_max = np.empty(lookback, dtype=np.float64)
+    suffix_low_min[-1] = low[-1]
+    suffix_high_max[-1] = high[-1]
+    for k in range(lookback - 2, -1, -1):
+        suffix_low_min[k] = min(low[start + k], suffix_low_min[k + 1])
+        suffix_high_max[k] = max(high[start + k], suffix_high_max[k + 1])
+
+    count = 0
+    for i in range(start, n):
+        if high[i] == highs[i]:
+            strength = (high[i] - suffix_low_min[i - start]) / high[i]
+            if strength > min_strength:
+                prices[count] = high[i]
+                types[count] = SWING_HIGH
+                strengths[count] = strength
+                count += 1
+    for i in range(start, n):
+        if low[i] == lows[i]:
+            strength = (suffix_high_max[i - start] - low[i]) / low[i]
+            if strength > min_strength:
+                prices[count] = low[i]
+                types[count] = SWING_LOW
+                strengths[count] = strength
+                count += 1
+
+    score = 0.0
+    code = 0
+    for k in range(count):
+        if abs(current_price - prices[k]) < proximity:
+            score += strengths[k] * 10
+            if types[k] == SWING_HIGH and current_price < prices[k]:
+                code = -1
+            elif types[k] == SWING_LOW and current_price > prices[k]:
+                code = 1
+
+    return score, code, prices[:count], types[:count], strengths[:count]
+
+@njit(cache=True, nogil=True)
+def liquidity_fused_kernel(close, open_, high, low, highs, lows, sorted_high, sorted_low,
+                           round_prices, round_weights, with_levels,
+                           cluster_lookback, cluster_range,
+                           swing_lookback, min_strength, swing_proximity,
+                           round_proximity, round_reaction_range):
+    """Stop cluster, round number and swing scores in one pass over the tail
+    Same results as stop_cluster_kernel, round_number_kernel and
+    swing_kernel; clusters and swings are skipped when `with_levels` is
+    False (frame too short).
+    Returns (sl_score, round_score, swing_score, sl_code, round_code,
+    swing_code, cluster_prices, cluster_types, cluster_strengths,
+    swing_prices, swing_types, swing_strengths)
+    """
+    n = len(close)
+    current_price = close[-1]
+
+    cluster_high_prices = np.empty(cluster_lookback, dtype=np.float64)
+    cluster_high_strengths = np.empty(cluster_lookback, dtype=np.int64)
+    cluster_low_prices = np.empty(cluster_lookback, dtype=np.float64)
+    cluster_low_strengths = np.empty(cluster_lookback, dtype=np.int64)
+    swing_high_prices = np.empty(swing_lookback, dtype=np.float64)
+    swing_high_strengths = np.empty(swing_lookback, dtype=np.float64)
+    swing_low_prices = np.empty(swing_lookback, dtype=np.float64)
+    swing_low_strengths = np.empty(swing_lookback, dtype=np.float64)
+    n_cluster_high = 0
+    n_cluster_low = 0
+    n_swing_high = 0
+    n_swing_low = 0
+
+    if with_levels:
+        tail = max(cluster_lookback, swing_lookback)
+        cluster_start = n - cluster_lookback
+        swing_start = n - swing_lookback
+        # Backward over the tail so the swing suffix extremes build up on the way
+        suffix_low_min = np.inf
+        suffix_high_max = -np.inf
+        for i in range(n - 1, n - tail - 1, -1):
+            suffix_low_min = min(low[i], suffix_low_min)
+            suffix_high_max = max(high[i], suffix_high_max)
+            is_high = high[i] == highs[i]
+            is_low = low[i] == lows[i]
+            if i >= cluster_start:
+                if is_high:
+                    cluster_high_prices[n_cluster_high] = highs[i]
+                    cluster_high_strengths[n_cluster_high] = np.searchsorted(sorted_high, highs[i], side='left')
+                    n_cluster_high += 1
+                if is_low:
+                    cluster_low_prices[n_cluster_low] = lows[i]
+                    cluster_low_strengths[n_cluster_low] = n - np.searchsorted(sorted_low, lows[i], side='right')
+                    n_cluster_low += 1
+            if i >= swing_start:
+                if is_high:
+                    strength = (high[i] - suffix_low_min) / high[i]
+                    if strength > min_strength:
+                        swing_high_prices[n_swing_high] = high[i]
+                        swing_high_strengths[n_swing_high] = strength
+                        n_swing_high += 1
+                if is_low:
+                    strength = (suffix_high_max - low[i]) / low[i]
+                    if strength > min_strength:
+                        swing_low_prices[n_swing_low] = low[i]
+                        swing_low_strengths[n_swing_low] = strength
+                        n_swing_low += 1
+
+    # Levels were collected newest first; lay them out oldest first, highs then lows
+    n_clusters = n_cluster_high + n_cluster_low
+    cluster_prices = np.empty(n_clusters, dtype=np.float64)
+    cluster_types = np.empty(n_clusters, dtype=np.int8)
+    cluster_strengths = np.empty(n_clusters, dtype=np.int64)
+    for k in range(n_cluster_high):
+        cluster_prices[k] = cluster_high_prices[n_cluster_high - 1 - k]
+        cluster_types[k] = RESISTANCE
+        cluster_strengths[k] = cluster_high_strengths[n_cluster_high - 1 - k]
+    for k in range(n_cluster_low):
+        cluster_prices[n_cluster_high + k] = cluster_low_prices[n_cluster_low - 1 - k]
+        cluster_types[n_cluster_high + k] = SUPPORT
+        cluster_strengths[n_cluster_high + k] = cluster_low_strengths[n_cluster_low - 1 - k]
+
+    n_swings = n_swing_high + n_swing_low
+    swing_prices = np.empty(n_swings, dtype=np.float64)
+    swing_types = np.empty(n_swings, dtype=np.int8)
+    swing_strengths = np.empty(n_swings, dtype=np.float64)
+    for k in range(n_swing_high):
+        swing_prices[k] = swing_high_prices[n_swing_high - 1 - k]
+        swing_types[k] = SWING_HIGH
+        swing_strengths[k] = swing_high_strengths[n_swing_high - 1 - k]
+    for k in range(n_swing_low):
+        swing_prices[n_swing_high + k] = swing_low_prices[n_swing_low - 1 - k]
+        swing_types[n_swing_high + k] = SWING_LOW
+        swing_strengths[n_swing_high + k] = swing_low_strengths[n_swing_low - 1 - k]
+
+    sl_score = 0.0
+    sl_code = 0
+    for k in range(n_clusters):
+        distance = abs(current_price - cluster_prices[k])
+        if distance < cluster_range:
+            sl_score += min(5.0, cluster_range - distance)
+            sl_code = -1 if cluster_types[k] == RESISTANCE else 1
+
+    swing_score = 0.0
+    swing_code = 0
+    for k in range(n_swings):
+        if abs(current_price - swing_prices[k]) < swing_proximity:
+            swing_score += swing_strengths[k] * 10
+            if swing_types[k] == SWING_HIGH and current_price < swing_prices[k]:
+                swing_code = -1
+            elif swing_types[k] == SWING_LOW and current_price > swing_prices[k]:
+                swing_code = 1
+
+    round_score, round_code = round_number_kernel(
+        close, open_, round_prices, round_weights, round_proximity, round_reaction_range
+    )
+
+    return (sl_score, round_score, swing_score, sl_code, round_code, swing_code,
+            cluster_prices, cluster_types, cluster_strengths,
+            swing_prices, swing_types, swing_strengths)
+
+@njit(cache=True, nogil=True, error_model='numpy')
+def range_stats_kernel(high, low, close_last):
+    """High, low and position of close_last in the range, in one pass
+    A flat range gives an inf/NaN position, as with NumPy division.
+    Returns (range_high, range_low, current_price, range_position)
+    """
+    range_high = high[0]
+    range_low = low[0]
+    for i in range(1, len(high)):
+        if high[i] > range_high:
+            range_high = high[i]
+        if low[i] < range_low:
+            range_low = low[i]
+    range_position = (close_last - range_low) / (range_high - range_low)
+    return range_high, range_low, close_last, range_position
+
+@njit(cache=True, nogil=True)
+def swing_levels_kernel(high, low, is_resistance, is_support):
+    """Mark bars whose high (low) beats the two bars on each side
+    Fills the preallocated boolean arrays in one pass; the first and last
+    two bars are never marked.
+    """
+    n = len(high)
+    is_resistance[:] = False
+    is_support[:] = False
+    for i in range(2, n - 2):
+        h = high[i]
+        is_resistance[i] = h > high[i - 1] and h > high[i - 2] and h > high[i + 1] and h > high[i + 2]
+        l = low[i]
+        is_support[i] = l < low[i - 1] and l < low[i - 2] and l < low[i + 1] and l < low[i + 2]
+
+@njit(cache=True, nogil=True)
+def atr_kernel(high, low, close, period):
+    """Mean true range of the last `period` bars, NaN when there are fewer
+    The first bar's true range is its high - low (no previous close).
+    """
+    n = len(close)
+    if period <= 0 or n < period:
+        return np.nan
+    total = 0.0
+    for i in range(n - period, n):
+        tr = high[i] - low[i]
+        if i > 0:
+            tr = max(tr, abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+        total += tr
+    return total / period
+
+@njit(cache=True, nogil=True)
+def institutional_candle_kernel(open_, high, low, close, volume, window, lookback):
+    """Institutional candle score of the last `lookback` bars
+    Body and volume averages over `window` bars are kept as rolling sums
+    across those bars; a bar without a full window never scores on them.
+    Per bar: 4 for a body > 2x average, 3 for volume > 1.5x average,
+    3 for a range < 1.2x body. Once anything scores, the last bar gives the
+    direction (close == open counts as bearish).
+    Returns (score, signal_code, last_body, avg_body, last_volume, avg_volume)
+    """
+    n = len(close)
+    score = 0.0
+    body_sum = 0.0
+    volume_sum = 0.0
+    avg_body = np.nan
+    avg_volume = np.nan
+    first = n - lookback
+    # Sums of the window ending just before the first scored bar
+    start = max(first - window + 1, 0)
+    for i in range(start, first):
+        body_sum += abs(close[i] - open_[i])
+        volume_sum += float(volume[i])
+    for i in range(first, n):
+        body = abs(close[i] - open_[i])
+        bar_volume = float(volume[i])
+        body_sum += body
+        volume_sum += bar_volume
+        if i - window >= start:
+            body_sum -= abs(close[i - window] - open_[i - window])
+            volume_sum -= float(volume[i - window])
+        if i - window + 1 >= 0:
+            avg_body = body_sum / window
+            avg_volume = volume_sum / window
+        else:
+            avg_body = np.nan
+            avg_volume = np.nan
+        if body > 2 * avg_body:
+            score += 4
+        if bar_volume > 1.5 * avg_volume:
+            score += 3
+        if high[i] - low[i] < 1.2 * body:
+            score += 3
+
+    code = 0
+    if score > 0:
+        code = 1 if close[-1] > open_[-1] else -1
+    return (score, code, abs(close[-1] - open_[-1]), avg_body,
+            float(volume[-1]), avg_volume)
+
+@njit(cache=True, nogil=True, error_model='numpy')
+def return_stats_kernel(close):
+    """Sample std (ddof=1) of the bar-to-bar returns and the last return
+    Welford's update on returns computed on the fly, no returns array.
+    Fewer than two returns give a NaN std.
+    Returns (std, last_return)
+    """
+    mean = 0.0
+    m2 = 0.0
+    count = 0
+    last_return = np.nan
+    for i in range(1, len(close)):
+        last_return = close[i] / close[i - 1] - 1
+        count += 1
+        delta = last_return - mean
+        mean += delta / count
+        m2 += delta * (last_return - mean)
+    if count < 2:
+        return np.nan, last_return
+    return np.sqrt(m2 / (count - 1)), last_return
+
+@njit(cache=True, nogil=True)
+def velocity_kernel(close, window):
+    """Velocity (mean change over `window` bars) and acceleration of the last bar
+    The sum of `window` consecutive changes telescopes to the difference of
+    the closes at its ends, so each velocity is one subtraction whatever
+    the window, and a flat window gives exactly 0.
+    Needs at least window + 2 closes.
+    Returns (velocity, acceleration)
+    """
+    n = len(close)
+    velocity = (close[n - 1] - close[n - 1 - window]) / window
+    prev_velocity = (close[n - 2] - close[n - 2 - window]) / window
+    return velocity, velocity - prev_velocity
+
+@njit(cache=True, nogil=True)
+def volume_spike_kernel(volume, window):
+    """Whether the last bar's volume is above 1.5x the mean of the last `window`
+    Integer volumes: tested as 2 * window * current > 3 * sum, so there is
+    no division and no float rounding.
+    """
+    n = len(volume)
+    total = 0
+    for i in range(n - window, n):
+        total += volume[i]
+    return 2 * window * volume[n - 1] > 3 * total
+
+@njit(cache=True, nogil=True)
+def velocity_volume_kernel(close, open_last, volume, velocity_window, volume_window):
+    """Velocity and volume spike signal codes of the last bar in one call
+    `close` needs velocity_window + 2 closes and `volume` volume_window
+    volumes; `open_last` is the last bar's open.
+    Returns (velocity_code, volume_code)
+    """
+    velocity, acceleration = velocity_kernel(close, velocity_window)
+    # Branchless: each comparison is 0/1, the codes are their differences
+    bull = int(velocity > 0) & int(acceleration > 0)
+    bear = int(velocity < 0) & int(acceleration < 0)
+    velocity_code = bull - bear
+
+    spike = int(volume_spike_kernel(volume, volume_window))
+    up = int(close[-1] > open_last)
+    volume_code = spike * (2 * up - 1)
+    return velocity_code, volume_code
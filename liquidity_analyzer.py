@@ -3,11 +3,19 @@ Maps liquidity pools and potential stop clusters"""
 
 import pandas as pd
 import numpy as np
-from typing import Dict, Tuple, List
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict, Tuple, List, Optional, Union
 from dataclasses import dataclass
 from datetime import datetime
 import logging
 
+from ohlcv_arrays import OHLCVArrays, as_ohlcv_arrays, price_dtype
+from kernels import (
+    stop_cluster_kernel, round_number_kernel, swing_kernel, liquidity_fused_kernel,
+    warmup_variants, RESISTANCE, SWING_HIGH
+)
+from signal_types import NEUTRAL, signal_label
+
 @dataclass
 class LiquiditySignal:
     signal_type: str          # BULLISH, BEARISH, NEUTRAL
@@ -29,223 +37,257 @@ class LiquidityAnalyzer:
         self.SWING_PERIOD = 20     # Periods for swing points
         self.MIN_SWING_STRENGTH = 3 # Minimum swing strength
 
-    def analyze_stop_clusters(self, df: pd.DataFrame) -> Tuple[float, str, Dict]:
+        # Scoring runs on float32 prices unless the symbol ticks finer than 1e-5
+        self.price_dtype = price_dtype(config.get('trading', {}).get('tick_size'))
+
+        # Round number grid relative to the integer price: majors (100s) then minors (50s)
+        major_offsets = np.arange(-2, 3) * 100.0
+        minor_offsets = np.arange(-4, 5) * 50.0
+        self._round_offsets = np.concatenate([major_offsets, minor_offsets])
+        self._round_weights = np.concatenate([
+            np.full(len(major_offsets), 4.0),
+            np.full(len(minor_offsets), 2.0)
+        ])
+        self._round_types = ('major',) * len(major_offsets) + ('minor',) * len(minor_offsets)
+
+        # Rolling swing bands of the last analysed frame
+        self._rolling_cache = {}
+
+        self._warmup_kernels()
+
+    def _warmup_kernels(self):
+        """Compile the numba kernels at startup instead of in the trading loop"""
+        dummy = np.linspace(1.0, 2.0, 60).astype(self.price_dtype)
+        bands = np.full(60, np.nan, dtype=self.price_dtype)
+        stop_cluster_kernel(dummy, dummy, dummy, bands, bands, dummy, dummy, 20, 5.0)
+        round_number_kernel(dummy, dummy, np.ones(3), np.ones(3), 5.0, 2.0)
+        swing_kernel(dummy, dummy, dummy, bands, bands, 10, 0.03, 10.0)
+        # OHLC may be read-only frame columns, the bands and sorted copies never are
+        for prices in warmup_variants(dummy):
+            liquidity_fused_kernel(prices, prices, prices, prices, bands, bands, dummy, dummy,
+                                   np.ones(3), np.ones(3), True, 20, 5.0, 10, 0.03, 10.0, 5.0, 2.0)
+
+    @staticmethod
+    def _cluster_list(prices, types, strengths) -> List[Dict]:
+        """Stop cluster kernel output as metric dicts"""
+        return [
+            {
+                'price': price,
+                'type': 'resistance' if kind == RESISTANCE else 'support',
+                'strength': int(strength)
+            }
+            for price, kind, strength in zip(prices, types, strengths)
+        ]
+
+    @staticmethod
+    def _swing_list(prices, types, strengths) -> List[Dict]:
+        """Swing kernel output as metric dicts"""
+        return [
+            {
+                'price': price,
+                'type': 'high' if kind == SWING_HIGH else 'low',
+                'strength': strength
+            }
+            for price, kind, strength in zip(prices, types, strengths)
+        ]
+
+    def _swing_bands(self, arrs: OHLCVArrays) -> Tuple[np.ndarray, np.ndarray]:
+        """Centered rolling high/low bands, computed once per frame
+        Matches pandas rolling(SWING_PERIOD, center=True): NaN where the
+        window does not fit.
+        """
+        cache = self._rolling_cache
+        if cache.get('arrs') is arrs and cache.get('len') == len(arrs):
+            return cache['highs'], cache['lows']
+
+        window = self.SWING_PERIOD
+        highs = np.full(len(arrs), np.nan, dtype=arrs.high.dtype)
+        lows = np.full(len(arrs), np.nan, dtype=arrs.low.dtype)
+        if len(arrs) >= window:
+            # Window starting at i - window//2 is centered on i
+            offset = window // 2
+            stop = offset + len(arrs) - window + 1
+            highs[offset:stop] = sliding_window_view(arrs.high, window).max(axis=1)
+            lows[offset:stop] = sliding_window_view(arrs.low, window).min(axis=1)
+        # Holding the arrays themselves keeps their id() from being reused while cached
+        self._rolling_cache = {
+            'arrs': arrs,
+            'len': len(arrs),
+            'highs': highs,
+            'lows': lows,
+            'sorted_high': np.sort(arrs.high),
+            'sorted_low': np.sort(arrs.low)
+        }
+        return highs, lows
+
+    def _sorted_extremes(self, arrs: OHLCVArrays) -> Tuple[np.ndarray, np.ndarray]:
+        """Sorted copies of high/low for O(log N) level counts, once per frame"""
+        self._swing_bands(arrs)
+        return self._rolling_cache['sorted_high'], self._rolling_cache['sorted_low']
+
+    def analyze_stop_clusters(self, arrs: OHLCVArrays,
+                              highs: Optional[np.ndarray] = None,
+                              lows: Optional[np.ndarray] = None) -> Tuple[float, int, Dict]:
         """Stop loss cluster estimation (15 points max)
         Identifies:
         - Potential stop loss clusters
         - Order block areas
         - Liquidity pools
+        Returns (score, signal code, metrics), see signal_types
         """
         try:
-            if len(df) < 50:
-                return 0.0, "NEUTRAL", {}
+            if len(arrs) < 50:
+                return 0.0, NEUTRAL, {}
 
-            score = 0.0
-            signal = "NEUTRAL"
             metrics = {}
 
             # Find swing points
-            highs = df['high'].rolling(self.SWING_PERIOD, center=True).max()
-            lows = df['low'].rolling(self.SWING_PERIOD, center=True).min()
+            if highs is None or lows is None:
+                highs, lows = self._swing_bands(arrs)
             
             # Identify potential stop clusters
-            current_price = df['close'].iloc[-1]
-            clusters = []
-            
-            # Above current price
-            for i in range(-20, 0):
-                if highs.iloc[i] == df['high'].iloc[i]:
-                    clusters.append({
-                        'price': highs.iloc[i],
-                        'type': 'resistance',
-                        'strength': len(df[df['high'] < highs.iloc[i]].index)
-                    })
-            
-            # Below current price
-            for i in range(-20, 0):
-                if lows.iloc[i] == df['low'].iloc[i]:
-                    clusters.append({
-                        'price': lows.iloc[i],
-                        'type': 'support',
-                        'strength': len(df[df['low'] > lows.iloc[i]].index)
-                    })
-
-            # Score based on proximity to clusters
-            for cluster in clusters:
-                distance = abs(current_price - cluster['price'])
-                if distance < self.CLUSTER_RANGE:
-                    cluster_score = min(5.0, (self.CLUSTER_RANGE - distance))
-                    score += cluster_score
-                    
-                    if cluster['type'] == 'resistance':
-                        signal = "BEARISH"
-                    else:
-                        signal = "BULLISH"
-
+            current_price = arrs.close[-1]
+            sorted_high, sorted_low = self._sorted_extremes(arrs)
+            score, code, prices, types, strengths = stop_cluster_kernel(
+                arrs.close, arrs.high, arrs.low, highs, lows,
+                sorted_high, sorted_low, 20, float(self.CLUSTER_RANGE)
+            )
             metrics = {
-                'clusters': clusters,
+                'clusters': self._cluster_list(prices, types, strengths),
                 'current_price': current_price
             }
 
-            return min(15.0, score), signal, metrics
+            return min(15.0, score), code, metrics
 
         except Exception as e:
-            self.logger.error(f"Stop cluster analysis error: {e}")
-            return 0.0, "NEUTRAL", {}
+            self.logger.error("Stop cluster analysis error: %s", e)
+            return 0.0, NEUTRAL, {}
 
-    def analyze_round_numbers(self, df: pd.DataFrame) -> Tuple[float, str, Dict]:
+    def analyze_round_numbers(self, arrs: OHLCVArrays) -> Tuple[float, int, Dict]:
         """Round number magnetism analysis (10 points max)
         Analyzes:
         - Proximity to psychological levels
         - Historical reaction at round numbers
         - Magnetism effect strength
+        Returns (score, signal code, metrics), see signal_types
         """
         try:
-            if len(df) < 20:
-                return 0.0, "NEUTRAL", {}
+            if len(arrs) < 20:
+                return 0.0, NEUTRAL, {}
 
-            score = 0.0
-            signal = "NEUTRAL"
             metrics = {}
 
-            current_price = df['close'].iloc[-1]
+            current_price = arrs.close[-1]
             
             # Define round number levels
             base_price = int(current_price)
-            round_levels = []
+            prices = base_price + self._round_offsets
             
-            # Major levels (100s)
-            for i in range(-2, 3):
-                round_levels.append({
-                    'price': base_price + (i * 100),
-                    'type': 'major',
-                    'weight': 4.0
-                })
-            
-            # Minor levels (50s)
-            for i in range(-4, 5):
-                round_levels.append({
-                    'price': base_price + (i * 50),
-                    'type': 'minor',
-                    'weight': 2.0
-                })
-            
-            # Score based on proximity
-            for level in round_levels:
-                distance = abs(current_price - level['price'])
-                if distance < 5:  # Within 5 pips
-                    score += level['weight'] * (1 - distance/5)
-                    
-                    # Check historical reaction
-                    reactions = df[abs(df['close'] - level['price']) < 2]
-                    if len(reactions) > 0:
-                        recent_reaction = reactions.iloc[-1]
-                        if recent_reaction['close'] > recent_reaction['open']:
-                            signal = "BULLISH"
-                        else:
-                            signal = "BEARISH"
+            # Score based on proximity and historical reaction
+            score, code = round_number_kernel(
+                arrs.close, arrs.open, prices, self._round_weights, 5.0, 2.0
+            )
 
             metrics = {
-                'round_levels': round_levels,
+                'round_levels': prices,  # Level types in self._round_types
                 'current_price': current_price
             }
 
-            return min(10.0, score), signal, metrics
+            return min(10.0, score), code, metrics
 
         except Exception as e:
-            self.logger.error(f"Round number analysis error: {e}")
-            return 0.0, "NEUTRAL", {}
+            self.logger.error("Round number analysis error: %s", e)
+            return 0.0, NEUTRAL, {}
 
-    def analyze_swing_points(self, df: pd.DataFrame) -> Tuple[float, str, Dict]:
+    def analyze_swing_points(self, arrs: OHLCVArrays,
+                             highs: Optional[np.ndarray] = None,
+                             lows: Optional[np.ndarray] = None) -> Tuple[float, int, Dict]:
         """Swing high/low analysis (10 points max)
         Analyzes:
         - Recent swing point formation
         - Swing point strength
         - Multiple timeframe confluence
+        Returns (score, signal code, metrics), see signal_types
         """
         try:
-            if len(df) < 50:
-                return 0.0, "NEUTRAL", {}
+            if len(arrs) < 50:
+                return 0.0, NEUTRAL, {}
 
-            score = 0.0
-            signal = "NEUTRAL"
             metrics = {}
 
             # Find recent swing points
-            window = self.SWING_PERIOD
-            highs = df['high'].rolling(window=window, center=True).max()
-            lows = df['low'].rolling(window=window, center=True).min()
+            if highs is None or lows is None:
+                highs, lows = self._swing_bands(arrs)
             
-            current_price = df['close'].iloc[-1]
+            current_price = arrs.close[-1]
             
             # Analyze recent swings
-            recent_swings = []
-            
-            # High swings
-            for i in range(-10, 0):
-                if df['high'].iloc[i] == highs.iloc[i]:
-                    strength = (df['high'].iloc[i] - df['low'].iloc[i:].min()) / df['high'].iloc[i]
-                    if strength > self.MIN_SWING_STRENGTH / 100:  # Convert to percentage
-                        recent_swings.append({
-                            'price': df['high'].iloc[i],
-                            'type': 'high',
-                            'strength': strength
-                        })
-            
-            # Low swings
-            for i in range(-10, 0):
-                if df['low'].iloc[i] == lows.iloc[i]:
-                    strength = (df['high'].iloc[i:].max() - df['low'].iloc[i]) / df['low'].iloc[i]
-                    if strength > self.MIN_SWING_STRENGTH / 100:
-                        recent_swings.append({
-                            'price': df['low'].iloc[i],
-                            'type': 'low',
-                            'strength': strength
-                        })
-
-            # Score based on swing points
-            for swing in recent_swings:
-                distance = abs(current_price - swing['price'])
-                if distance < 10:  # Within 10 pips
-                    score += swing['strength'] * 10
-                    
-                    if swing['type'] == 'high' and current_price < swing['price']:
-                        signal = "BEARISH"
-                    elif swing['type'] == 'low' and current_price > swing['price']:
-                        signal = "BULLISH"
-
+            score, code, prices, types, strengths = swing_kernel(
+                arrs.close, arrs.high, arrs.low, highs, lows,
+                10, self.MIN_SWING_STRENGTH / 100, 10.0  # Convert to percentage
+            )
             metrics = {
-                'swings': recent_swings,
+                'swings': self._swing_list(prices, types, strengths),
                 'current_price': current_price
             }
 
-            return min(10.0, score), signal, metrics
+            return min(10.0, score), code, metrics
 
         except Exception as e:
-            self.logger.error(f"Swing point analysis error: {e}")
-            return 0.0, "NEUTRAL", {}
+            self.logger.error("Swing point analysis error: %s", e)
+            return 0.0, NEUTRAL, {}
 
-    def get_liquidity_signal(self, df: pd.DataFrame) -> LiquiditySignal:
+    def get_liquidity_signal(self, df: Union[pd.DataFrame, OHLCVArrays]) -> LiquiditySignal:
         """Aggregate all liquidity analysis components"""
         try:
-            # Get component scores
-            sl_score, sl_signal, sl_metrics = self.analyze_stop_clusters(df)
-            round_score, round_signal, round_metrics = self.analyze_round_numbers(df)
-            swing_score, swing_signal, swing_metrics = self.analyze_swing_points(df)
+            # Extract the columns once; the analyses below only touch arrays
+            arrs = as_ohlcv_arrays(df, self.price_dtype)
+
+            # Get component scores from a single fused pass; the minimum frame
+            # lengths match analyze_stop_clusters/_round_numbers/_swing_points
+            sl_score = round_score = swing_score = 0.0
+            sl_code = round_code = swing_code = NEUTRAL
+            sl_metrics, round_metrics, swing_metrics = {}, {}, {}
+            if len(arrs) >= 20:
+                with_levels = len(arrs) >= 50
+                highs, lows = self._swing_bands(arrs)
+                sorted_high, sorted_low = self._sorted_extremes(arrs)
+                current_price = arrs.close[-1]
+                round_prices = int(current_price) + self._round_offsets
+                (sl_score, round_score, swing_score, sl_code, round_code, swing_code,
+                 cluster_prices, cluster_types, cluster_strengths,
+                 swing_prices, swing_types, swing_strengths) = liquidity_fused_kernel(
+                    arrs.close, arrs.open, arrs.high, arrs.low, highs, lows,
+                    sorted_high, sorted_low, round_prices, self._round_weights, with_levels,
+                    20, float(self.CLUSTER_RANGE),
+                    10, self.MIN_SWING_STRENGTH / 100, 10.0,
+                    5.0, 2.0
+                )
+                sl_score = min(15.0, sl_score)
+                round_score = min(10.0, round_score)
+                swing_score = min(10.0, swing_score)
+                round_metrics = {
+                    'round_levels': round_prices,
+                    'current_price': current_price
+                }
+                if with_levels:
+                    sl_metrics = {
+                        'clusters': self._cluster_list(cluster_prices, cluster_types, cluster_strengths),
+                        'current_price': current_price
+                    }
+                    swing_metrics = {
+                        'swings': self._swing_list(swing_prices, swing_types, swing_strengths),
+                        'current_price': current_price
+                    }
+                else:
+                    sl_score = swing_score = 0.0
+                    sl_code = swing_code = NEUTRAL
 
             # Calculate total score
             total_score = sl_score + round_score + swing_score
 
-            # Determine final signal
-            signals = [sl_signal, round_signal, swing_signal]
-            bullish_count = signals.count("BULLISH")
-            bearish_count = signals.count("BEARISH")
-
-            final_signal = "NEUTRAL"
-            if bullish_count > bearish_count:
-                final_signal = "BULLISH"
-            elif bearish_count > bullish_count:
-                final_signal = "BEARISH"
+            # Determine final signal: majority vote is the sign of the code sum
+            final_signal = signal_label(int(np.sign(sl_code + round_code + swing_code)))
 
             # Combine metrics
             all_metrics = {
@@ -253,9 +295,9 @@ class LiquidityAnalyzer:
                 **round_metrics,
                 **swing_metrics,
                 'component_signals': {
-                    'stop_clusters': sl_signal,
-                    'round_numbers': round_signal,
-                    'swing_points': swing_signal
+                    'stop_clusters': signal_label(sl_code),
+                    'round_numbers': signal_label(round_code),
+                    'swing_points': signal_label(swing_code)
                 }
             }
 
@@ -265,9 +307,9 @@ class LiquidityAnalyzer:
                 for cluster in sl_metrics['clusters']:
                     levels[f"cluster_{cluster['type']}"] = cluster['price']
             if 'round_levels' in round_metrics:
-                for level in round_metrics['round_levels']:
-                    if abs(level['price'] - df['close'].iloc[-1]) < 10:
-                        levels[f"round_{level['type']}"] = level['price']
+                round_prices = round_metrics['round_levels']
+                for i in np.flatnonzero(np.abs(round_prices - arrs.close[-1]) < 10):
+                    levels[f"round_{self._round_types[i]}"] = round_prices[i]
 
             return LiquiditySignal(
                 signal_type=final_signal,
@@ -281,7 +323,7 @@ class LiquidityAnalyzer:
             )
 
         except Exception as e:
-            self.logger.error(f"Liquidity signal error: {e}")
+            self.logger.error("Liquidity signal error: %s", e)
             return LiquiditySignal(
                 signal_type="NEUTRAL",
                 strength=0.0,
@@ -4,11 +4,12 @@ Main Entry Point
 """
 
 import logging
+from logging.handlers import MemoryHandler
 import time
+import queue
 from datetime import datetime, timezone
 import sys
 from pathlib import Path
-import MetaTrader5 as mt5
 from rich.console import Console
 from rich.panel import Panel
 from rich.logging import RichHandler
@@ -17,7 +18,7 @@ from colorama import Fore, Back, Style
 
 # Local imports
 from price_action_analyzer import PriceActionAnalyzer
-from data_handler import DataHandler
+from data_handler import DataHandler, MarketDataProducer, MarketSnapshot
 from config import SYSTEM_CONFIG
 from multi_timeframe_analyzer import MultitimeframeAnalyzer
 from volume_analyzer import VolumeAnalyzer
@@ -35,9 +36,9 @@ colorama.init()
 
 class TradingSystem:
     def __init__(self):
+        self.console = Console()
         self.setup_logging()
         self.logger = logging.getLogger(__name__)
-        self.console = Console()
         self.initialize_components()
         
     def setup_logging(self):
@@ -48,14 +49,22 @@ class TradingSystem:
         current_time = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
         log_file = log_dir / f"trading_{current_time}.log"
         
-        # Setup rich console handler
-        console = Console()
+        # File output is buffered and flushed every 100 records or on warnings
+        file_handler = logging.FileHandler(log_file)
+        file_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        buffered_file_handler = MemoryHandler(
+            capacity=100,
+            flushLevel=logging.WARNING,
+            target=file_handler
+        )
+        
+        # Setup rich console handler, sharing the system console
         logging.basicConfig(
             level=logging.INFO,
             format="%(message)s",
             handlers=[
-                RichHandler(console=console, rich_tracebacks=True),
-                logging.FileHandler(log_file)
+                RichHandler(console=self.console, rich_tracebacks=True),
+                buffered_file_handler
             ]
         )
 
@@ -112,30 +121,35 @@ class TradingSystem:
             self.console.print(f"[bold red]✗ Initialization error: {e}[/]")
             sys.exit(1)
 
-    def check_trading_conditions(self) -> bool:
+    def check_trading_conditions(self, snapshot: MarketSnapshot) -> bool:
         """Check if trading conditions are met"""
         try:
             # Get account info
-            account_info = self.data_handler.get_account_info()
+            account_info = snapshot.account_info
             if not account_info:
                 return False
                 
             # Check if we've hit daily loss limit
             daily_loss_limit = SYSTEM_CONFIG['risk_management']['max_daily_loss']
-            if account_info['profit'] < -(account_info['balance'] * daily_loss_limit / 100):
+            if account_info.profit < -(account_info.balance * daily_loss_limit / 100):
                 self.logger.warning("Daily loss limit reached")
                 return False
             
-            # Check if we've hit max daily trades
-            today_trades = len(mt5.positions_get())
-            if today_trades >= SYSTEM_CONFIG['risk_management']['max_daily_trades']:
+            # Check if we've hit max daily trades (open positions count towards it too)
+            open_positions = self.data_handler.get_open_positions_count()
+            today_trades = self.data_handler.get_daily_trades_count()
+            if open_positions is None or today_trades is None:
+                return False
+            if max(open_positions, today_trades) >= SYSTEM_CONFIG['risk_management']['max_daily_trades']:
                 self.logger.warning("Maximum daily trades reached")
                 return False
             
             # Check spread
-            symbol_info = self.data_handler.get_symbol_info()
-            if symbol_info['spread'] > SYSTEM_CONFIG['trading']['max_spread']:
-                self.logger.warning(f"Spread too high: {symbol_info['spread']}")
+            symbol_info = snapshot.symbol_info
+            if not symbol_info:
+                return False
+            if symbol_info.spread > SYSTEM_CONFIG['trading']['max_spread']:
+                self.logger.warning(f"Spread too high: {symbol_info.spread}")
                 return False
             
             return True
@@ -183,28 +197,44 @@ class TradingSystem:
         
         self.console.print(f"[bold green]✓ Connected to MT5. Trading {SYSTEM_CONFIG['trading']['symbol']}[/]")
         
+        # Market data is fetched in the background on each new tick while the previous cycle is analysed
+        self.market_data = MarketDataProducer(self.data_handler, m1_count=2000, tick_count=1000)
+        self.tick_event = self.market_data.tick_event
+        self.market_data.start()
+        
         try:
             while True:
-                current_time = datetime.now(timezone.utc)
+                with self.console.status("[cyan]Waiting for market data...[/]"):
+                    if not self.tick_event.wait(timeout=5):
+                        self.console.print("[bold red]✗ No new tick received in 5s. Retrying...[/]")
+                        continue
+                    self.tick_event.clear()
+                    try:
+                        snapshot = self.market_data.snapshots.get_nowait()
+                    except queue.Empty:
+                        # Already consumed on the previous wake-up
+                        continue
+                
+                current_time = snapshot.timestamp
                 self.console.rule(f"[cyan]Analysis Cycle - {current_time.strftime('%Y-%m-%d %H:%M:%S')}[/]")
                 
                 with self.console.status("[yellow]Checking trading conditions...[/]"):
-                    if not self.check_trading_conditions():
+                    if not self.check_trading_conditions(snapshot):
                         self.console.print("[yellow]⚠ Trading conditions not met. Waiting 60s...[/]")
                         time.sleep(60)
                         continue
                 
-                with self.console.status("[cyan]Fetching market data...[/]"):
-                    m1_data = self.data_handler.get_ohlcv_data('M1', 2000)
-                    tick_data = self.data_handler.get_tick_data(1000)
-                    
-                    if m1_data.empty or tick_data.empty:
-                        self.console.print("[bold red]✗ Failed to get market data. Retrying in 10s...[/]")
-                        time.sleep(10)
-                        continue
+                if snapshot.m1_data.empty or snapshot.tick_data.empty:
+                    self.console.print("[bold red]✗ Failed to get market data. Retrying in 10s...[/]")
+                    time.sleep(10)
+                    continue
                 
                 with self.console.status("[cyan]Analyzing market signals...[/]"):
-                    signal = self.signal_aggregator.get_aggregated_signal(self.data_handler)
+                    signal = self.signal_aggregator.get_aggregated_signal(
+                        self.data_handler,
+                        m1_data=snapshot.m1_data,
+                        tick_data=snapshot.tick_data
+                    )
                 
                 self.display_signal_panel(signal)
                 
@@ -213,6 +243,9 @@ class TradingSystem:
                         result = self.trade_executor.execute_trade(signal)
                     
                     if result['success']:
+                        # The cached daily count predates this trade; it would be missed
+                        # once its position closes within the cache window
+                        self.data_handler.invalidate_cache('get_daily_trades_count')
                         self.console.print(Panel(
                             f"[green]✓ Trade executed successfully[/]\n" +
                             f"Entry: {result['entry']}\n" +
@@ -225,14 +258,17 @@ class TradingSystem:
                     else:
                         self.console.print(f"[bold red]✗ Trade execution failed: {result['message']}[/]")
                 
-                self.console.print("[cyan]Waiting for next analysis cycle (Wait 4sec)...[/]")
-                time.sleep(3)
-                
         except KeyboardInterrupt:
             self.console.print("\n[yellow]⚠ Received shutdown signal. Closing gracefully...[/]")
+            self.market_data.stop()
+            self.signal_aggregator.shutdown()
+            self.trade_executor.shutdown()
             self.data_handler.shutdown()
         except Exception as e:
             self.console.print(f"[bold red]✗ Critical error in main loop: {str(e)}[/]")
+            self.market_data.stop()
+            self.signal_aggregator.shutdown()
+            self.trade_executor.shutdown()
             self.data_handler.shutdown()
 
 if __name__ == "__main__":
@@ -2,11 +2,15 @@
 
 import pandas as pd
 import numpy as np
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple, Union
 from dataclasses import dataclass
 from datetime import datetime, time
 import logging
 
+from ohlcv_arrays import OHLCVArrays, as_ohlcv_arrays
+from kernels import range_stats_kernel, warmup_variants
+from signal_types import BULLISH, BEARISH, NEUTRAL, signal_label
+
 @dataclass
 class MarketContextSignal:
     signal_type: str
@@ -35,177 +39,248 @@ class MarketContextAnalyzer:
                 'end': time(22, 0)     # 22:00 +7UTC ( indonesia )
             }
         }
+        self._build_session_tables()
+        
+        # Frames are checked for these before the (unguarded) analysis
+        self._required_cols = ('open', 'high', 'low', 'close')
+        
+        # Compile the range kernel at startup instead of in the trading loop,
+        # for float64 frames and the float32 arrays the aggregator passes
+        for dtype in (np.float64, np.float32):
+            for dummy in warmup_variants(np.ones(2, dtype=dtype)):
+                range_stats_kernel(dummy, dummy, dummy[-1])
     
-    def analyze_session_timing(self, current_time: datetime) -> Tuple[float, str, Dict]:
-        """Analyze session timing (10 points max)"""
-        try:
-            score = 0
-            signal = "NEUTRAL"
-            session_info = {}
-            
-            current_utc = current_time.time()
-            
-            # Determine current session(s)
-            active_sessions = []
-            for session, times in self.sessions.items():
-                if times['start'] <= current_utc <= times['end']:
-                    active_sessions.append(session)
-            
-            session_info['active_sessions'] = active_sessions
-            
-            # Score based on session activity
-            if len(active_sessions) > 1:  # Session overlap
-                score += 5  # Higher volatility expected
-                if 'london' in active_sessions and 'new_york' in active_sessions:
-                    score += 3  # Most active overlap
-            elif len(active_sessions) == 1:
-                if active_sessions[0] == 'asian':
-                    score += 3  # Usually range-bound
-                else:
-                    score += 4  # Active session
-            
-            # Check for session transitions
-            for session, times in self.sessions.items():
-                mins_to_start = ((times['start'].hour * 60 + times['start'].minute) - 
-                               (current_utc.hour * 60 + current_utc.minute)) % 1440
-                if mins_to_start <= 30:  # Within 30 mins of session start
-                    score += 2
-            
-            return min(10.0, score), signal, session_info
-            
-        except Exception as e:
-            self.logger.error(f"Session timing analysis error: {e}")
-            return 0.0, "NEUTRAL", {}
+    def _build_session_tables(self):
+        """Precompute per minute-of-day session lookups
+        Bit k of _active_mask / _end_mask is session k (in self.sessions
+        order): active for [start, end), and exactly at the end time.
+        _transition_count holds how many sessions start within 30 mins and
+        _activity_score the session activity score of each bitmask.
+        """
+        self._session_names = tuple(self.sessions)
+        self._session_starts_min = np.array([
+            times['start'].hour * 60 + times['start'].minute for times in self.sessions.values()
+        ], dtype=np.int32)
+        self._active_mask = np.zeros(1440, dtype=np.uint8)
+        self._end_mask = np.zeros(1440, dtype=np.uint8)
+        for bit, times in enumerate(self.sessions.values()):
+            start = self._session_starts_min[bit]
+            end = times['end'].hour * 60 + times['end'].minute
+            self._active_mask[start:end] |= 1 << bit
+            self._end_mask[end] |= 1 << bit
+        # Sessions with (start - m) % 1440 <= 30, all sessions x minutes at once
+        minutes = np.arange(1440, dtype=np.int32)
+        self._transition_count = (
+            (self._session_starts_min[:, None] - minutes) % 1440 <= 30
+        ).sum(axis=0).astype(np.uint8)
+        self._activity_score = np.array([
+            self._session_activity_score([
+                session for bit, session in enumerate(self._session_names)
+                if bits & (1 << bit)
+            ])
+            for bits in range(1 << len(self._session_names))
+        ], dtype=np.uint8)
     
-    def analyze_high_low_proximity(self, df: pd.DataFrame) -> Tuple[float, str, Dict]:
-        """Analyze previous day H/L proximity (10 points max)"""
-        try:
-            if len(df) < 1440:  # Need full day of M1 data
-                return 0.0, "NEUTRAL", {}
-            
-            score = 0
-            signal = "NEUTRAL"
-            metrics = {}
-            
-            # Get previous day's range
-            prev_day = df.iloc[-1440:-1]
-            prev_high = prev_day['high'].max()
-            prev_low = prev_day['low'].min()
-            prev_range = prev_high - prev_low
-            
-            current_price = df['close'].iloc[-1]
-            
-            # Calculate distances
-            dist_to_high = abs(current_price - prev_high)
-            dist_to_low = abs(current_price - prev_low)
-            
-            metrics.update({
-                'prev_day_high': prev_high,
-                'prev_day_low': prev_low,
-                'dist_to_high': dist_to_high,
-                'dist_to_low': dist_to_low
-            })
-            
-            # Score based on proximity
-            if dist_to_high < prev_range * 0.1:  # Within 10% of high
-                score += 5
-                signal = "BEARISH"  # Potential resistance
-            elif dist_to_low < prev_range * 0.1:  # Within 10% of low
-                score += 5
-                signal = "BULLISH"  # Potential support
-            
-            # Score based on range position
-            range_position = (current_price - prev_low) / prev_range
-            metrics['range_position'] = range_position
-            
-            if 0.4 <= range_position <= 0.6:  # Mid-range
-                score += 5
-            
-            return min(10.0, score), signal, metrics
-            
-        except Exception as e:
-            self.logger.error(f"H/L proximity analysis error: {e}")
-            return 0.0, "NEUTRAL", {}
+    @staticmethod
+    def _session_activity_score(active_sessions: List[str]) -> int:
+        """Score based on session activity"""
+        score = 0
+        if len(active_sessions) > 1:  # Session overlap
+            score += 5  # Higher volatility expected
+            if 'london' in active_sessions and 'new_york' in active_sessions:
+                score += 3  # Most active overlap
+        elif len(active_sessions) == 1:
+            if active_sessions[0] == 'asian':
+                score += 3  # Usually range-bound
+            else:
+                score += 4  # Active session
+        return score
     
-    def analyze_asian_range_breakout(self, df: pd.DataFrame) -> Tuple[float, str, Dict]:
-        """Analyze Asian range breakout validation (5 points max)"""
-        try:
-            if len(df) < 600:  # Need at least 10 hours of M1 data
-                return 0.0, "NEUTRAL", {}
-            
-            score = 0
-            signal = "NEUTRAL"
-            metrics = {}
-            
-            # Define Asian session (last Asian session)
-            asian_session = df.iloc[-600:-240]  # 22:00-08:00 UTC
-            asian_high = asian_session['high'].max()
-            asian_low = asian_session['low'].min()
-            asian_range = asian_high - asian_low
-            
-            current_price = df['close'].iloc[-1]
-            
-            metrics.update({
-                'asian_high': asian_high,
-                'asian_low': asian_low,
-                'asian_range': asian_range
-            })
-            
-            # Check for breakout
-            if current_price > asian_high:
-                breakout_size = (current_price - asian_high) / asian_range
-                if breakout_size > 0.5:  # Strong breakout
-                    score += 3
-                    signal = "BULLISH"
-                score += 2
-                signal = "BULLISH"
-            elif current_price < asian_low:
-                breakout_size = (asian_low - current_price) / asian_range
-                if breakout_size > 0.5:  # Strong breakout
-                    score += 3
-                    signal = "BEARISH"
-                score += 2
-                signal = "BEARISH"
-            
-            return min(5.0, score), signal, metrics
-            
-        except Exception as e:
-            self.logger.error(f"Asian range breakout analysis error: {e}")
-            return 0.0, "NEUTRAL", {}
+    def analyze_session_timing(self, current_time: datetime) -> Tuple[float, int, Dict]:
+        """Analyze session timing (10 points max)
+        Returns (score, signal code, session info), see signal_types
+        """
+        score = 0
+        signal = NEUTRAL
+        session_info = {}
+        
+        current_utc = current_time.time()
+        
+        # Determine current session(s)
+        minute = current_utc.hour * 60 + current_utc.minute
+        active_bits = int(self._active_mask[minute])
+        if current_utc.second == 0 and current_utc.microsecond == 0:
+            active_bits |= int(self._end_mask[minute])
+        active_sessions = [
+            session for bit, session in enumerate(self._session_names)
+            if active_bits & (1 << bit)
+        ]
+        
+        session_info['active_sessions'] = active_sessions
+        
+        # Score based on session activity, looked up by active bitmask
+        score += int(self._activity_score[active_bits])
+        
+        # Check for session transitions (within 30 mins of session start)
+        score += 2 * int(self._transition_count[minute])
+        
+        return min(10.0, score), signal, session_info
+    
+    @staticmethod
+    def _time_window(ts: np.ndarray, start: np.datetime64, end: np.datetime64,
+                     side: str = 'left') -> slice:
+        """Slice of the bars with start <= time < end (bar times are sorted)
+        side='right' gives start < time <= end instead.
+        """
+        bounds = np.array([start, end]).astype(ts.dtype)
+        lo, hi = np.searchsorted(ts, bounds, side=side)
+        return slice(lo, hi)
     
-    def get_market_context_signal(self, df: pd.DataFrame) -> MarketContextSignal:
-        """Get complete market context analysis"""
+    def analyze_high_low_proximity(self, arrs: OHLCVArrays) -> Tuple[float, int, Dict]:
+        """Analyze previous day H/L proximity (10 points max)
+        The previous calendar day is found by bar time, so any timeframe
+        works; only the part of that day present in the frame is used.
+        Expects at least one bar, see get_market_context_signal.
+        Returns (score, signal code, metrics), see signal_types
+        """
+        # Get previous day's bars
+        prev_start = arrs.ts[-1].astype('datetime64[D]') - np.timedelta64(1, 'D')
+        prev_day = self._time_window(arrs.ts, prev_start, prev_start + np.timedelta64(1, 'D'))
+        if prev_day.stop <= prev_day.start:  # No bars of the previous day
+            return 0.0, NEUTRAL, {}
+        
+        score = 0
+        signal = NEUTRAL
+        metrics = {}
+        
+        # Get previous day's range
+        prev_high, prev_low, current_price, range_position = range_stats_kernel(
+            arrs.high[prev_day],
+            arrs.low[prev_day],
+            arrs.close[-1]
+        )
+        prev_range = prev_high - prev_low
+        
+        # Calculate distances
+        dist_to_high = abs(current_price - prev_high)
+        dist_to_low = abs(current_price - prev_low)
+        
+        metrics.update({
+            'prev_day_high': prev_high,
+            'prev_day_low': prev_low,
+            'dist_to_high': dist_to_high,
+            'dist_to_low': dist_to_low
+        })
+        
+        # Score based on proximity
+        if dist_to_high < prev_range * 0.1:  # Within 10% of high
+            score += 5
+            signal = BEARISH  # Potential resistance
+        elif dist_to_low < prev_range * 0.1:  # Within 10% of low
+            score += 5
+            signal = BULLISH  # Potential support
+        
+        # Score based on range position
+        metrics['range_position'] = range_position
+        
+        if 0.4 <= range_position <= 0.6:  # Mid-range
+            score += 5
+        
+        return min(10.0, score), signal, metrics
+    
+    def analyze_asian_range_breakout(self, arrs: OHLCVArrays) -> Tuple[float, int, Dict]:
+        """Analyze Asian range breakout validation (5 points max)
+        The Asian range is taken by bar time, the bars after 10 and up to
+        4 hours before the last bar.
+        Expects at least one bar, see get_market_context_signal.
+        Returns (score, signal code, metrics), see signal_types
+        """
+        # Define Asian session (last Asian session)
+        last_time = arrs.ts[-1]
+        asian_start = last_time - np.timedelta64(10, 'h')
+        asian = self._time_window(arrs.ts, asian_start, last_time - np.timedelta64(4, 'h'), side='right')
+        # Need at least 10 hours of data: the window excludes asian_start, so the
+        # history is long enough when the bar before the first one would be at
+        # or before it (600 gapless M1 bars)
+        if len(arrs) < 2 or arrs.ts[0] - (arrs.ts[1] - arrs.ts[0]) > asian_start or asian.stop <= asian.start:
+            return 0.0, NEUTRAL, {}
+        
+        score = 0
+        signal = NEUTRAL
+        metrics = {}
+        
+        asian_high, asian_low, current_price, _ = range_stats_kernel(
+            arrs.high[asian],  # 22:00-08:00 UTC
+            arrs.low[asian],
+            arrs.close[-1]
+        )
+        asian_range = asian_high - asian_low
+        
+        metrics.update({
+            'asian_high': asian_high,
+            'asian_low': asian_low,
+            'asian_range': asian_range
+        })
+        
+        # Check for breakout: 2 points, plus 3 for a strong one
+        # (a flat range counts any breakout as strong)
+        breakout_size = 0.0
+        if current_price > asian_high:
+            breakout_size = (current_price - asian_high) / max(asian_range, 1e-12)
+            signal = BULLISH
+        elif current_price < asian_low:
+            breakout_size = (asian_low - current_price) / max(asian_range, 1e-12)
+            signal = BEARISH
+        if signal != NEUTRAL:
+            score = 2 + 3 * (breakout_size > 0.5)  # Strong breakout
+        
+        return min(5.0, score), signal, metrics
+    
+    @staticmethod
+    def _neutral_signal(current_time: datetime) -> MarketContextSignal:
+        return MarketContextSignal(
+            signal_type="NEUTRAL",
+            strength=0.0,
+            timestamp=current_time,
+            session_info={},
+            details={}
+        )
+    
+    def get_market_context_signal(self, df: Union[pd.DataFrame, OHLCVArrays]) -> MarketContextSignal:
+        """Get complete market context analysis
+        Input is validated here; the analyze_* steps have no error handling
+        of their own, any failure gives the neutral signal.
+        """
         try:
             current_time = datetime.utcnow()
             
+            if isinstance(df, pd.DataFrame) and not set(self._required_cols).issubset(df.columns):
+                return self._neutral_signal(current_time)
+            
+            # Extract the columns once for both range checks
+            arrs = as_ohlcv_arrays(df)
+            if len(arrs) == 0:
+                return self._neutral_signal(current_time)
+            
             # Get individual scores
             session_score, session_signal, session_info = self.analyze_session_timing(current_time)
-            hl_score, hl_signal, hl_metrics = self.analyze_high_low_proximity(df)
-            asian_score, asian_signal, asian_metrics = self.analyze_asian_range_breakout(df)
+            hl_score, hl_signal, hl_metrics = self.analyze_high_low_proximity(arrs)
+            asian_score, asian_signal, asian_metrics = self.analyze_asian_range_breakout(arrs)
             
             # Calculate total score
             total_score = sum([session_score, hl_score, asian_score])
             
-            # Determine final signal
-            signals = [session_signal, hl_signal, asian_signal]
-            bullish_count = signals.count("BULLISH")
-            bearish_count = signals.count("BEARISH")
-            
-            if bullish_count > bearish_count:
-                final_signal = "BULLISH"
-            elif bearish_count > bullish_count:
-                final_signal = "BEARISH"
-            else:
-                final_signal = "NEUTRAL"
+            # Determine final signal: majority direction is the sign of the code sum
+            final_signal = signal_label(int(np.sign(session_signal + hl_signal + asian_signal)))
             
             details = {
                 'session_timing': session_score,
                 'hl_proximity': hl_score,
                 'asian_breakout': asian_score,
                 'signals': {
-                    'session': session_signal,
-                    'hl': hl_signal,
-                    'asian': asian_signal
+                    'session': signal_label(session_signal),
+                    'hl': signal_label(hl_signal),
+                    'asian': signal_label(asian_signal)
                 }
             }
             
@@ -222,11 +297,5 @@ class MarketContextAnalyzer:
             )
             
         except Exception as e:
-            self.logger.error(f"Market context analysis error: {e}")
-            return MarketContextSignal(
-                signal_type="NEUTRAL",
-                strength=0.0,
-                timestamp=datetime.utcnow(),
-                session_info={},
-                details={}
-            )
\ No newline at end of file
+            self.logger.error("Market context analysis error: %s", e)
+            return self._neutral_signal(datetime.utcnow())
\ No newline at end of file
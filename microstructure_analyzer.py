@@ -1,8 +1,11 @@
 """Market Microstructure Analysis Module"""
 import pandas as pd
-from typing import Dict
+import numpy as np
+from typing import Dict, Optional, Union
 from datetime import datetime, timezone
 import logging
+
+from ohlcv_arrays import OHLCVArrays
 datetime.now(timezone.utc)
 class MicrostructureSignal:
     def __init__(self):
@@ -16,8 +19,54 @@ class MicrostructureAnalyzer:
     def __init__(self, config: Dict):
         self.config = config
         self.logger = logging.getLogger(__name__)
+        
+        # Spread sum over the closed bars of the last frame, see _spread_mean
+        self._spread_state = None
+
+    def _spread_mean(self, spread: np.ndarray, ts: Optional[np.ndarray]) -> float:
+        """Mean spread of the frame, updated from the previous frame's sum
+        Rows that left the window are subtracted and rows added since are
+        added; the last (forming) row is added on top. The frames are lined
+        up on their sorted row times, so this is only done when the first
+        new time and the last previous time each occur once in both frames;
+        otherwise (repeated times, no overlap, no times) the sum is
+        recomputed. Sums stay in the column's dtype.
+        """
+        n = len(spread)
+        state = self._spread_state if ts is not None else None
+        total = None
+        if state is not None and n > 1:
+            prev_ts, prev_spread = state['ts'], state['spread']
+            m = len(prev_ts)
+            first, last = ts[0], prev_ts[-1]
+            k = np.searchsorted(prev_ts, first)   # Rows of prev before the new frame
+            j = np.searchsorted(ts, last)         # Row of prev's last row in the new frame
+            if (k < m and prev_ts[k] == first and (k + 1 == m or prev_ts[k + 1] != first)
+                    and ts[1] != first
+                    and j < n - 1 and ts[j] == last and ts[j + 1] != last
+                    and (m == 1 or prev_ts[-2] != last)):
+                total = state['sum'] - prev_spread[:k].sum() + spread[j + 1:n - 1].sum()
+        if total is None:
+            total = spread[:n - 1].sum()
+        if ts is not None:
+            self._spread_state = {'ts': ts[:n - 1], 'spread': spread[:n - 1], 'sum': total}
+        return float(total + spread[-1]) / n
+
+    @staticmethod
+    def _columns(df: Union[pd.DataFrame, OHLCVArrays]) -> tuple:
+        """(spread, time, open, close) arrays, None where the data has no such column
+        Tick frames are timed by time_msc, which is finer than their time
+        """
+        if isinstance(df, OHLCVArrays):
+            return df.spread, df.ts, df.open, df.close
+        time_col = 'time_msc' if 'time_msc' in df.columns else 'time'
+        return tuple(
+            df[col].to_numpy() if col in df.columns else None
+            for col in ('spread', time_col, 'open', 'close')
+        )
 
-    def get_microstructure_signal(self, data_handler, df: pd.DataFrame) -> MicrostructureSignal:
+    def get_microstructure_signal(self, data_handler,
+                                  df: Union[pd.DataFrame, OHLCVArrays]) -> MicrostructureSignal:
         """Analyze market microstructure"""
         try:
             signal = MicrostructureSignal()
@@ -26,20 +75,21 @@ class MicrostructureAnalyzer:
                 return signal
 
             # Analyze bid-ask spread and tick data
-            if 'spread' in df.columns:
-                avg_spread = df['spread'].mean()
-                current_spread = df['spread'].iloc[-1]
+            spread, ts, open_, close = self._columns(df)
+            if spread is not None:
+                avg_spread = self._spread_mean(spread, ts)
+                current_spread = spread[-1]
                 
                 if current_spread < avg_spread * 0.8:  # Tight spread
-                    if df['close'].iloc[-1] > df['open'].iloc[-1]:
+                    if close[-1] > open_[-1]:
                         signal.signal_type = "BULLISH"
                         signal.strength = 18.0
-                    elif df['close'].iloc[-1] < df['open'].iloc[-1]:
+                    elif close[-1] < open_[-1]:
                         signal.signal_type = "BEARISH"
                         signal.strength = 18.0
             
             return signal
 
         except Exception as e:
-            self.logger.error(f"Microstructure analysis error: {e}")
+            self.logger.error("Microstructure analysis error: %s", e)
             return MicrostructureSignal()
\ No newline at end of file
@@ -1,9 +1,11 @@
 """Multi-Timeframe Analysis Module"""
 import pandas as pd
-from typing import Dict
+from typing import Dict, Union
 from datetime import datetime, timezone
 import logging
 
+from ohlcv_arrays import OHLCVArrays, as_ohlcv_arrays
+
 class MultitimeframeSignal:
     def __init__(self):
         self.signal_type = "NEUTRAL"  # BULLISH, BEARISH, NEUTRAL
@@ -17,28 +19,29 @@ class MultitimeframeAnalyzer:
         self.config = config
         self.logger = logging.getLogger(__name__)
 
-    def get_mtf_signal(self, df: pd.DataFrame) -> MultitimeframeSignal:
+    def get_mtf_signal(self, df: Union[pd.DataFrame, OHLCVArrays]) -> MultitimeframeSignal:
         """Analyze multiple timeframes"""
         try:
             signal = MultitimeframeSignal()
             
             # Basic implementation - to be enhanced
-            if len(df) < 2:
+            if len(df) < 50:
                 return signal
 
-            # Example: Simple trend analysis
-            ma20 = df['close'].rolling(20).mean()
-            ma50 = df['close'].rolling(50).mean()
+            # Example: Simple trend analysis, only the last window of each MA is needed
+            close = as_ohlcv_arrays(df).close
+            ma20 = close[-20:].mean()
+            ma50 = close[-50:].mean()
             
-            if ma20.iloc[-1] > ma50.iloc[-1]:
+            if ma20 > ma50:
                 signal.signal_type = "BULLISH"
                 signal.strength = 25.0
-            elif ma20.iloc[-1] < ma50.iloc[-1]:
+            elif ma20 < ma50:
                 signal.signal_type = "BEARISH"
                 signal.strength = 25.0
             
             return signal
 
         except Exception as e:
-            self.logger.error(f"MTF analysis error: {e}")
+            self.logger.error("MTF analysis error: %s", e)
             return MultitimeframeSignal()
\ No newline at end of file
@@ -6,10 +6,16 @@ Version: 2.0
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple, Union
+from dataclasses import dataclass, replace
 from datetime import datetime, timezone
 import logging
 import talib
+from talib import abstract
+
+from ohlcv_arrays import OHLCVArrays, as_ohlcv_arrays
+from indicator_cache import get_indicator
+from kernels import swing_levels_kernel, warmup_variants
 
 class PriceActionSignal:
     def __init__(self):
@@ -21,6 +27,92 @@ class PriceActionSignal:
         self.stop_loss = None
         self.take_profit = None
 
+# Momentum indicator periods (TA-Lib RSI / MACD defaults)
+RSI_PERIOD = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+
+@dataclass
+class MomentumState:
+    """Wilder RSI averages and MACD EMAs after the bar at `ts`"""
+    ts: Optional[np.datetime64]
+    last_close: float
+    avg_gain: float
+    avg_loss: float
+    ema_fast: float
+    ema_slow: float
+    ema_signal: float
+
+    @classmethod
+    def from_closes(cls, close: List[float], ts=None) -> "MomentumState":
+        """Seed and run the state over `close` as talib.RSI/MACD do
+        Needs at least MACD_SLOW + MACD_SIGNAL - 1 closes.
+        """
+        # RSI: simple average of the first RSI_PERIOD changes
+        avg_gain = avg_loss = 0.0
+        for prev, value in zip(close[:RSI_PERIOD], close[1:RSI_PERIOD + 1]):
+            diff = value - prev
+            if diff < 0:
+                avg_loss -= diff
+            else:
+                avg_gain += diff
+        state = cls(ts, close[RSI_PERIOD], avg_gain / RSI_PERIOD, avg_loss / RSI_PERIOD,
+                    0.0, 0.0, 0.0)
+        
+        # MACD: both EMAs are seeded with SMAs ending on the same bar
+        start = MACD_SLOW - 1
+        state.ema_slow = sum(close[:start + 1]) / MACD_SLOW
+        state.ema_fast = sum(close[start + 1 - MACD_FAST:start + 1]) / MACD_FAST
+        
+        macd_values = [state.ema_fast - state.ema_slow]
+        for i in range(RSI_PERIOD + 1, len(close)):
+            state._update_rsi(close[i])
+            if i <= start:
+                continue
+            state._update_macd_emas(close[i])
+            macd_value = state.ema_fast - state.ema_slow
+            if len(macd_values) < MACD_SIGNAL:
+                macd_values.append(macd_value)
+                if len(macd_values) == MACD_SIGNAL:
+                    state.ema_signal = sum(macd_values) / MACD_SIGNAL
+            else:
+                state.ema_signal = (macd_value - state.ema_signal) * (2.0 / (MACD_SIGNAL + 1)) + state.ema_signal
+        return state
+
+    def _update_rsi(self, value: float):
+        diff = value - self.last_close
+        self.last_close = value
+        self.avg_gain *= RSI_PERIOD - 1
+        self.avg_loss *= RSI_PERIOD - 1
+        if diff < 0:
+            self.avg_loss -= diff
+        else:
+            self.avg_gain += diff
+        self.avg_gain /= RSI_PERIOD
+        self.avg_loss /= RSI_PERIOD
+
+    def _update_macd_emas(self, value: float):
+        self.ema_fast = (value - self.ema_fast) * (2.0 / (MACD_FAST + 1)) + self.ema_fast
+        self.ema_slow = (value - self.ema_slow) * (2.0 / (MACD_SLOW + 1)) + self.ema_slow
+
+    def update(self, value: float, ts=None):
+        """Fold in the close of the next bar"""
+        self._update_rsi(value)
+        self._update_macd_emas(value)
+        macd_value = self.ema_fast - self.ema_slow
+        self.ema_signal = (macd_value - self.ema_signal) * (2.0 / (MACD_SIGNAL + 1)) + self.ema_signal
+        self.ts = ts
+
+    @property
+    def rsi(self) -> float:
+        total = self.avg_gain + self.avg_loss
+        if -1e-8 < total < 1e-8:
+            return 0.0
+        return 100.0 * (self.avg_gain / total)
+
+    @property
+    def macd(self) -> float:
+        return self.ema_fast - self.ema_slow
+
 class PriceActionAnalyzer:
     def __init__(self, config: Dict):
         self.config = config
@@ -31,6 +123,8 @@ class PriceActionAnalyzer:
         self.trend_period = 200
         self.vol_period = 14
         self.min_pattern_size = 3
+        # S/R levels are merged on this price grid (XAUUSD tick by default)
+        self.level_tick = config.get('trading', {}).get('tick_size') or 0.01
         
         # Pattern score weights
         self.weights = {
@@ -40,130 +134,180 @@ class PriceActionAnalyzer:
             'support_res': 6.0,   # Max 5 points
             'volatility': 5.0     # Max 5 points
         }
+        
+        # Candlestick patterns checked on the last bar, in report order
+        self.candle_patterns = (
+            ('Doji', talib.CDLDOJI),
+            ('Hammer', talib.CDLHAMMER),
+            ('Shooting Star', talib.CDLSHOOTINGSTAR),
+            ('Engulfing', talib.CDLENGULFING),
+            ('Evening Star', talib.CDLEVENINGSTAR),
+            ('Morning Star', talib.CDLMORNINGSTAR)
+        )
+        # Bars a pattern needs for its last value, including the body/shadow averages
+        self.candle_tail = 1 + max(
+            abstract.Function(func.__name__).lookback for _, func in self.candle_patterns
+        )
+        
+        # Trend (direction, strength) by packed EMA cascade comparisons, see _trend_rule
+        self._trend_lut = [self._trend_rule(key >> 3, key & 0b111) for key in range(64)]
+        
+        # Momentum state up to the last closed bar, carried across calls
+        self._momentum_state = None
+        
+        # Compile the swing kernel at startup instead of in the trading loop
+        for dummy in warmup_variants(np.ones(5)):
+            swing_levels_kernel(dummy, dummy, np.empty(5, dtype=np.bool_), np.empty(5, dtype=np.bool_))
 
-    def identify_candlestick_patterns(self, df: pd.DataFrame) -> List[str]:
+    def identify_candlestick_patterns(self, open_: np.ndarray, high: np.ndarray,
+                                      low: np.ndarray, close: np.ndarray) -> List[str]:
         """Identify Japanese candlestick patterns"""
         patterns = []
         
-        # Single Candlestick Patterns
-        doji = talib.CDLDOJI(df['open'], df['high'], df['low'], df['close'])
-        hammer = talib.CDLHAMMER(df['open'], df['high'], df['low'], df['close'])
-        shooting_star = talib.CDLSHOOTINGSTAR(df['open'], df['high'], df['low'], df['close'])
-        
-        # Multiple Candlestick Patterns
-        engulfing = talib.CDLENGULFING(df['open'], df['high'], df['low'], df['close'])
-        evening_star = talib.CDLEVENINGSTAR(df['open'], df['high'], df['low'], df['close'])
-        morning_star = talib.CDLMORNINGSTAR(df['open'], df['high'], df['low'], df['close'])
-        
-        # Check last 3 candles for patterns
-        last_idx = len(df) - 1
-        if doji[last_idx] != 0: patterns.append(('Doji', doji[last_idx]))
-        if hammer[last_idx] != 0: patterns.append(('Hammer', hammer[last_idx]))
-        if shooting_star[last_idx] != 0: patterns.append(('Shooting Star', shooting_star[last_idx]))
-        if engulfing[last_idx] != 0: patterns.append(('Engulfing', engulfing[last_idx]))
-        if evening_star[last_idx] != 0: patterns.append(('Evening Star', evening_star[last_idx]))
-        if morning_star[last_idx] != 0: patterns.append(('Morning Star', morning_star[last_idx]))
+        # Only the last bar is read, so the patterns run on the tail they need
+        o, h, l, c = (
+            arr[-self.candle_tail:] for arr in (open_, high, low, close)
+        )
+        
+        # Single then multiple candlestick patterns
+        for name, func in self.candle_patterns:
+            value = func(o, h, l, c)[-1]
+            if value != 0:
+                patterns.append((name, value))
         
         return patterns
 
-    def analyze_trend(self, df: pd.DataFrame) -> Dict:
+    @staticmethod
+    def _trend_rule(above: int, below: int) -> tuple:
+        """Trend for the comparison bits of (price/ema20, ema20/ema50, ema50/ema200)
+        `above` has bit 2/1/0 set where the first value is greater, `below`
+        where it is smaller.
+        """
+        if above == 0b111:
+            return 'BULLISH', 8.0
+        if below == 0b111:
+            return 'BEARISH', 8.0
+        if above & 0b110 == 0b110:
+            return 'BULLISH', 6.0
+        if below & 0b110 == 0b110:
+            return 'BEARISH', 6.0
+        return 'NEUTRAL', 0
+
+    def analyze_trend(self, close: np.ndarray) -> Dict:
         """Analyze price trend"""
-        trend_info = {'direction': 'NEUTRAL', 'strength': 0}
-        
         # Calculate EMAs
-        ema20 = talib.EMA(df['close'], timeperiod=20)
-        ema50 = talib.EMA(df['close'], timeperiod=50)
-        ema200 = talib.EMA(df['close'], timeperiod=200)
-        
-        current_price = df['close'].iloc[-1]
-        
-        # Determine trend direction
-        if current_price > ema20.iloc[-1] > ema50.iloc[-1] > ema200.iloc[-1]:
-            trend_info['direction'] = 'BULLISH'
-            trend_info['strength'] = 8.0
-        elif current_price < ema20.iloc[-1] < ema50.iloc[-1] < ema200.iloc[-1]:
-            trend_info['direction'] = 'BEARISH'
-            trend_info['strength'] = 8.0
-        elif current_price > ema20.iloc[-1] and ema20.iloc[-1] > ema50.iloc[-1]:
-            trend_info['direction'] = 'BULLISH'
-            trend_info['strength'] = 6.0
-        elif current_price < ema20.iloc[-1] and ema20.iloc[-1] < ema50.iloc[-1]:
-            trend_info['direction'] = 'BEARISH'
-            trend_info['strength'] = 6.0
-            
-        return trend_info
+        ema20 = get_indicator('ema20', close)[-1]
+        ema50 = get_indicator('ema50', close)[-1]
+        ema200 = get_indicator('ema200', close)[-1]
+        
+        current_price = close[-1]
+        
+        # Determine trend direction; separate above/below bits keep ties and NaN neutral
+        above = (current_price > ema20) << 2 | (ema20 > ema50) << 1 | (ema50 > ema200)
+        below = (current_price < ema20) << 2 | (ema20 < ema50) << 1 | (ema50 < ema200)
+        direction, strength = self._trend_lut[int(above) << 3 | int(below)]
+        
+        return {'direction': direction, 'strength': strength}
 
-    def find_support_resistance(self, df: pd.DataFrame) -> Dict:
-        """Find support and resistance levels"""
+    def find_support_resistance(self, high: np.ndarray, low: np.ndarray) -> Dict:
+        """Find support and resistance levels
+        Swing levels are rounded to level_tick and deduplicated, sorted ascending.
+        """
         levels = {'support': [], 'resistance': []}
+        if len(high) < 5:
+            return levels
         
-        # Find swing highs and lows
-        for i in range(2, len(df)-2):
-            if df['high'].iloc[i] > df['high'].iloc[i-1] and \
-               df['high'].iloc[i] > df['high'].iloc[i-2] and \
-               df['high'].iloc[i] > df['high'].iloc[i+1] and \
-               df['high'].iloc[i] > df['high'].iloc[i+2]:
-                levels['resistance'].append(df['high'].iloc[i])
-                
-            if df['low'].iloc[i] < df['low'].iloc[i-1] and \
-               df['low'].iloc[i] < df['low'].iloc[i-2] and \
-               df['low'].iloc[i] < df['low'].iloc[i+1] and \
-               df['low'].iloc[i] < df['low'].iloc[i+2]:
-                levels['support'].append(df['low'].iloc[i])
+        # Find swing highs and lows: bar i beats the two bars on each side
+        res_mask = np.empty(len(high), dtype=np.bool_)
+        sup_mask = np.empty(len(low), dtype=np.bool_)
+        swing_levels_kernel(high, low, res_mask, sup_mask)
+        levels['resistance'] = np.unique(np.round(high[res_mask] / self.level_tick) * self.level_tick).tolist()
+        levels['support'] = np.unique(np.round(low[sup_mask] / self.level_tick) * self.level_tick).tolist()
         
         return levels
 
-    def calculate_momentum(self, df: pd.DataFrame) -> float:
-        """Calculate price momentum"""
-        # RSI
-        rsi = talib.RSI(df['close'], timeperiod=14)
+    def _momentum_indicators(self, close: np.ndarray,
+                             ts: Optional[np.ndarray] = None) -> Tuple[float, float, float]:
+        """Last RSI, MACD and MACD signal values
+        With bar times the state of the closed bars is kept and only bars
+        closed since the previous call are folded in; the forming last bar
+        is applied to a copy. Without times, or when the previous state's
+        bar is no longer in the frame, the state is rebuilt from the frame.
+        """
+        if len(close) < MACD_SLOW + MACD_SIGNAL:
+            return np.nan, np.nan, np.nan
         
-        # MACD
-        macd, signal, _ = talib.MACD(df['close'])
+        state = self._momentum_state if ts is not None else None
+        if state is not None:
+            j = np.searchsorted(ts, state.ts)
+            if j < len(ts) - 1 and ts[j] == state.ts:
+                for i in range(j + 1, len(ts) - 1):
+                    state.update(float(close[i]), ts[i])
+            else:
+                state = None
+        if state is None:
+            state = MomentumState.from_closes(
+                close[:-1].tolist(), ts[-2] if ts is not None else None
+            )
+            if ts is not None:
+                self._momentum_state = state
+        
+        current = replace(state)
+        current.update(float(close[-1]))
+        return current.rsi, current.macd, current.ema_signal
+
+    def calculate_momentum(self, close: np.ndarray, ts: Optional[np.ndarray] = None) -> float:
+        """Calculate price momentum"""
+        # RSI and MACD
+        rsi, macd, signal = self._momentum_indicators(close, ts)
         
         # Momentum score based on RSI and MACD
         momentum_score = 0.0
         
         # RSI conditions
-        if rsi.iloc[-1] > 70:
+        if rsi > 70:
             momentum_score -= 2.5
-        elif rsi.iloc[-1] < 30:
+        elif rsi < 30:
             momentum_score += 2.5
             
         # MACD conditions
-        if macd.iloc[-1] > signal.iloc[-1] and macd.iloc[-1] > 0:
+        if macd > signal and macd > 0:
             momentum_score += 2.5
-        elif macd.iloc[-1] < signal.iloc[-1] and macd.iloc[-1] < 0:
+        elif macd < signal and macd < 0:
             momentum_score -= 2.5
             
         return momentum_score
 
-    def get_price_action_signal(self, df: pd.DataFrame) -> PriceActionSignal:
+    def get_price_action_signal(self, df: Union[pd.DataFrame, OHLCVArrays]) -> PriceActionSignal:
         """Get comprehensive price action signal"""
         try:
             signal = PriceActionSignal()
             
             if len(df) < self.trend_period:
                 return signal
+            
+            # Convert the price columns once for all the steps below
+            arrs = as_ohlcv_arrays(df)
+            o, h, l, c = arrs.open, arrs.high, arrs.low, arrs.close
                 
             # 1. Analyze Trend
-            trend = self.analyze_trend(df)
+            trend = self.analyze_trend(c)
             
             # 2. Find Candlestick Patterns
-            patterns = self.identify_candlestick_patterns(df)
+            patterns = self.identify_candlestick_patterns(o, h, l, c)
             pattern_score = sum([1.0 for p in patterns]) * (self.weights['patterns'] / 3)
             
             # 3. Calculate Momentum
-            momentum_score = self.calculate_momentum(df)
+            momentum_score = self.calculate_momentum(c, arrs.ts)
             
             # 4. Find Support/Resistance
-            key_levels = self.find_support_resistance(df)
+            key_levels = self.find_support_resistance(h, l)
             sr_score = len(key_levels['support']) + len(key_levels['resistance'])
             sr_score = min(sr_score * 0.5, self.weights['support_res'])
             
             # 5. Calculate Volatility
-            atr = talib.ATR(df['high'], df['low'], df['close'], timeperiod=14)
-            volatility_score = min(5.0, (atr.iloc[-1] / atr.mean()) * 2.5)
+            atr = get_indicator('atr14', c, h, l)
+            volatility_score = min(5.0, (atr[-1] / np.nanmean(atr)) * 2.5)
             
             # Aggregate scores and determine signal
             total_score = (trend['strength'] + pattern_score + 
@@ -177,13 +321,13 @@ class PriceActionAnalyzer:
             # Determine signal direction
             if trend['direction'] == 'BULLISH' and total_score > 15:
                 signal.signal_type = "BULLISH"
-                signal.entry_price = df['close'].iloc[-1]
-                signal.stop_loss = min(df['low'].iloc[-5:])
+                signal.entry_price = c[-1]
+                signal.stop_loss = l[-5:].min()
                 signal.take_profit = signal.entry_price + (signal.entry_price - signal.stop_loss) * 1.5
             elif trend['direction'] == 'BEARISH' and total_score > 15:
                 signal.signal_type = "BEARISH"
-                signal.entry_price = df['close'].iloc[-1]
-                signal.stop_loss = max(df['high'].iloc[-5:])
+                signal.entry_price = c[-1]
+                signal.stop_loss = h[-5:].max()
                 signal.take_profit = signal.entry_price - (signal.stop_loss - signal.entry_price) * 1.5
                 
             signal.metrics = {
@@ -196,7 +340,7 @@ class PriceActionAnalyzer:
             return signal
             
         except Exception as e:
-            self.logger.error(f"Price action analysis error: {e}")
+            self.logger.error("Price action analysis error: %s", e)
             return PriceActionSignal()
 
     def __str__(self):
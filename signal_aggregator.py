@@ -1,23 +1,29 @@
 """Signal Aggregator untuk mengintegrasikan semua analisis"""
 
 import pandas as pd
-from typing import Dict, List
+import numpy as np
+from typing import Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass
+from collections import OrderedDict
 from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import logging
+import time
 import MetaTrader5 as mt5  # Jangan import dari MT5.py, langsung dari MetaTrader5
 
 from price_action_analyzer import PriceActionAnalyzer
 from multi_timeframe_analyzer import MultitimeframeAnalyzer
-from volume_analyzer import VolumeAnalyzer
 from statistical_analyzer import StatisticalAnalyzer
-from velocity_analyzer import VelocityAnalyzer
+from combined_analyzer import CombinedAnalyzer
 from microstructure_analyzer import MicrostructureAnalyzer
 from market_context_analyzer import MarketContextAnalyzer
 from smart_money_analyzer import SmartMoneyAnalyzer
 from liquidity_analyzer import LiquidityAnalyzer
+from ohlcv_arrays import OHLCVArrays, as_ohlcv_arrays, price_dtype
+from kernels import atr_kernel, warmup_variants
+from signal_types import BULLISH, BEARISH, signal_code, signal_label
 
-@dataclass
+@dataclass(slots=True)
 class AggregatedSignal:
     signal_type: str          # BULLISH, BEARISH, NEUTRAL
     total_score: float        # 0-200 points total
@@ -35,18 +41,38 @@ class SignalAggregator:
     def __init__(self, config: Dict):
         self.config = config
         self.logger = logging.getLogger(__name__)
+        self.price_dtype = price_dtype(config.get('trading', {}).get('tick_size'))
         
         # Initialize semua analyzers
         self.price_action = PriceActionAnalyzer(config)
         self.multi_tf = MultitimeframeAnalyzer(config)
-        self.volume = VolumeAnalyzer(config)
         self.statistical = StatisticalAnalyzer(config)
-        self.velocity = VelocityAnalyzer(config)
+        self.velocity_volume = CombinedAnalyzer(config)  # Velocity + volume sekaligus
         self.micro = MicrostructureAnalyzer(config)
         self.market_context = MarketContextAnalyzer(config)
-        self.smart_money = SmartMoneyAnalyzer(config)
+        self.smart_money = SmartMoneyAnalyzer(config, parallelize_inner=False)  # Sudah jalan di self._pool
         self.liquidity = LiquidityAnalyzer(config)
         
+        # Analyzer-analyzer independen, dijalankan paralel di pool yang dipakai ulang
+        # tiap tick (kernel numba/numpy melepas GIL)
+        self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="analyzer")
+        self.ANALYZER_TIMEOUT = 2.0  # Detik per analyzer sebelum dianggap gagal
+        # Future per analyzer yang timeout dan masih jalan; analyzer menyimpan state
+        # per instance tanpa lock, jadi tidak boleh di-submit lagi sebelum selesai
+        self._inflight = {}
+        
+        # Hasil analyzer per (name, state bar terakhir), LRU; tick tanpa perubahan
+        # bar M1 (dan spread-nya untuk micro) tidak dihitung ulang
+        self._sig_cache = OrderedDict()
+        self.SIG_CACHE_SIZE = 64
+        
+        # Kelipatan SL untuk TP1-TP3 (1.5R, 2.0R, 3.0R)
+        self._tp_mults = np.array([1.5, 2.0, 3.0])
+        
+        # Compile kernel ATR saat startup, bukan di trading loop
+        for dummy in warmup_variants(np.ones(2)):
+            atr_kernel(dummy, dummy, dummy, 1)
+        
         # Scoring thresholds
         self.ENTRY_THRESHOLD = 99  # 85% confidence UBAHH DISINI BAYUWAHIDIN
         self.MIN_COMPONENT_SCORES = {
@@ -60,79 +86,84 @@ class SignalAggregator:
             'smart_money': 22,      # Min 22/30
             'liquidity': 25         # Min 25/35
         }
+        self._components = tuple(self.MIN_COMPONENT_SCORES)
+        self._thr_arr = np.array([self.MIN_COMPONENT_SCORES[c] for c in self._components], dtype=np.float64)
 
-    def get_aggregated_signal(self, data_handler) -> AggregatedSignal:
-        """Get aggregated signal dari semua analyzers"""
+    def get_aggregated_signal(self,
+                              data_handler,
+                              m1_data: Optional[pd.DataFrame] = None,
+                              tick_data: Optional[pd.DataFrame] = None) -> AggregatedSignal:
+        """Get aggregated signal dari semua analyzers
+        m1_data/tick_data yang sudah di-fetch (mis. dari MarketSnapshot)
+        dipakai langsung tanpa request ulang ke MT5.
+        """
         try:
             # Get data untuk analysis
-            m1_data = data_handler.get_ohlcv_data(mt5.TIMEFRAME_M1, 2000)
-            tick_data = data_handler.get_tick_data(1000)
+            if m1_data is None:
+                m1_data = data_handler.get_ohlcv_data(mt5.TIMEFRAME_M1, 2000)
+            if tick_data is None:
+                tick_data = data_handler.get_tick_data(1000)
             
             if m1_data.empty or tick_data.empty:
                 raise ValueError("Insufficient data for analysis")
 
-            # Collect signals dari semua analyzers
-            pa_signal = self.price_action.get_price_action_signal(m1_data)
-            mtf_signal = self.multi_tf.get_mtf_signal(m1_data)
-            vol_signal = self.volume.get_volume_signal(m1_data)
-            stat_signal = self.statistical.get_statistical_signal(m1_data)
-            vel_signal = self.velocity.get_velocity_signal(m1_data)
-            micro_signal = self.micro.get_microstructure_signal(m1_data, tick_data)
-            context_signal = self.market_context.get_market_context_signal(m1_data)
-            sm_signal = self.smart_money.get_smart_money_signal(m1_data)
-            liq_signal = self.liquidity.get_liquidity_signal(m1_data)
-
-            # Collect component scores
-            component_scores = {
-                'price_action': float(getattr(pa_signal, 'strength', 0.0)),
-                'multi_tf': float(getattr(mtf_signal, 'strength', 0.0)),
-                'volume': float(getattr(vol_signal, 'strength', 0.0)),
-                'statistical': float(getattr(stat_signal, 'strength', 0.0)),
-                'velocity': float(getattr(vel_signal, 'strength', 0.0)),
-                'micro': float(getattr(micro_signal, 'strength', 0.0)),
-                'market_context': float(getattr(context_signal, 'strength', 0.0)),
-                'smart_money': float(getattr(sm_signal, 'strength', 0.0)),
-                'liquidity': float(getattr(liq_signal, 'strength', 0.0))
-            }
+            # Kolom OHLC di-extract sekali untuk analyzer yang menerima OHLCVArrays:
+            # float64 untuk talib (price action), float32 untuk reduksi min/max/mean
+            m1_arrays = OHLCVArrays.from_frame(m1_data)
+            m1_compact = OHLCVArrays.from_frame(m1_data, self.price_dtype)
+
+            # Key cache: bar yang sedang terbentuk ikut berubah tiap tick, jadi
+            # close/tick_volume bar terakhir termasuk key
+            bar_key = self._bar_key(m1_arrays)
+            spread_key = bar_key + self._spread_key(m1_arrays)
+
+            # Collect signals dari semua analyzers, paralel; velocity dan volume
+            # dihitung bersama dalam satu task
+            results = self._run_analyzers([
+                ('price_action', self.price_action.get_price_action_signal, (m1_arrays,), bar_key),
+                ('multi_tf', self.multi_tf.get_mtf_signal, (m1_compact,), bar_key),
+                ('statistical', self.statistical.get_statistical_signal, (m1_arrays,), bar_key),
+                ('velocity_volume', self.velocity_volume.get_signals, (m1_arrays,), bar_key),
+                ('micro', self.micro.get_microstructure_signal, (data_handler, m1_arrays), spread_key),
+                ('market_context', self.market_context.get_market_context_signal, (m1_compact,), bar_key),
+                ('smart_money', self.smart_money.get_smart_money_signal, (m1_arrays,), bar_key),
+                ('liquidity', self.liquidity.get_liquidity_signal, (m1_compact,), bar_key)
+            ])
+            results['velocity'], results['volume'] = results.pop('velocity_volume') or (None, None)
+            # Urutan komponen sama dengan MIN_COMPONENT_SCORES
+            component_signals = {component: results[component] for component in self._components}
 
-            # Collect component signals
-            component_signals = {
-                'price_action': pa_signal,
-                'multi_tf': mtf_signal,
-                'volume': vol_signal,
-                'statistical': stat_signal,
-                'velocity': vel_signal,
-                'micro': micro_signal,
-                'market_context': context_signal,
-                'smart_money': sm_signal,
-                'liquidity': liq_signal
+            # Collect component scores (None dari analyzer gagal = 0)
+            component_scores = {
+                component: float(signal.strength) if signal is not None else 0.0
+                for component, signal in component_signals.items()
             }
 
             # Calculate total score
             total_score = sum(component_scores.values())
 
-            # Validate minimum component scores
-            is_valid = True
-            for component, score in component_scores.items():
-                if score < self.MIN_COMPONENT_SCORES[component]:
-                    is_valid = False
-                    self.logger.warning(f"Component {component} score below threshold: {score} < {self.MIN_COMPONENT_SCORES[component]}")
-                    component_signals[component].signal_type = "NEUTRAL"     # Set to NEUTRAL if below threshold
-                else:
-                    self.logger.info(f"Component {component} score: {score}") 
-                    break
-
-            # Determine final signal type
-            signals = [getattr(s, 'signal_type', "NEUTRAL") for s in component_signals.values()]
-            bullish_count = signals.count("BULLISH")
-            bearish_count = signals.count("BEARISH")
-
-            if bullish_count > bearish_count:
-                final_signal = "BULLISH"
-            elif bearish_count > bullish_count:
-                final_signal = "BEARISH"
-            else:
-                final_signal = "NEUTRAL"
+            # Validate minimum component scores, semua komponen sekaligus
+            scores_arr = np.fromiter((component_scores[c] for c in self._components),
+                                     dtype=np.float64, count=len(self._components))
+            fail_mask = scores_arr < self._thr_arr
+            is_valid = not fail_mask.any()
+            for i in np.flatnonzero(fail_mask):
+                component = self._components[i]
+                self.logger.warning("Component %s score below threshold: %s < %s", component, scores_arr[i], self.MIN_COMPONENT_SCORES[component])
+                signal = component_signals[component]
+                # Set to NEUTRAL if below threshold; sinyal yang sudah NEUTRAL tidak
+                # ditulis (bisa jadi objek neutral bersama dari analyzer)
+                if signal is not None and signal.signal_type != "NEUTRAL":
+                    signal.signal_type = "NEUTRAL"
+
+            # Determine final signal type dari direction code per komponen
+            codes = np.fromiter(
+                (signal_code(getattr(s, 'signal_type', "NEUTRAL")) for s in component_signals.values()),
+                dtype=np.int8, count=len(component_signals)
+            )
+            bullish_count = int((codes == BULLISH).sum())
+            bearish_count = int((codes == BEARISH).sum())
+            final_signal = signal_label(int(np.sign(bullish_count - bearish_count)))
 
             # Combine key levels (merge support/resistance from all signals)
             key_levels = {}
@@ -147,27 +178,18 @@ class SignalAggregator:
                             key_levels[k].append(v)
 
             # Calculate entry, SL, and TP prices
-            current_price = m1_data['close'].iloc[-1]
+            current_price = m1_arrays.close[-1]
             entry_price = current_price
 
             # SL based on liquidity levels and ATR
-            atr = self.calculate_atr(m1_data)
+            atr = self.calculate_atr(m1_arrays)
             sl_distance = max(atr * 1.5, 5.0)  # Min 5 pips
             
-            if final_signal == "BULLISH":
-                sl_price = entry_price - sl_distance
-                tp_levels = [
-                    entry_price + (sl_distance * 1.5),  # TP1: 1.5R
-                    entry_price + (sl_distance * 2.0),  # TP2: 2.0R
-                    entry_price + (sl_distance * 3.0)   # TP3: 3.0R
-                ]
-            elif final_signal == "BEARISH":
-                sl_price = entry_price + sl_distance
-                tp_levels = [
-                    entry_price - (sl_distance * 1.5),  # TP1
-                    entry_price - (sl_distance * 2.0),  # TP2
-                    entry_price - (sl_distance * 3.0)   # TP3
-                ]
+            # SL di sisi berlawanan arah, TP searah; NEUTRAL tanpa SL/TP
+            direction = signal_code(final_signal)
+            if direction:
+                sl_price = entry_price - direction * sl_distance
+                tp_levels = (entry_price + direction * sl_distance * self._tp_mults).tolist()
             else:
                 sl_price = 0.0
                 tp_levels = []
@@ -180,7 +202,7 @@ class SignalAggregator:
                 'signal_counts': {
                     'bullish': bullish_count,
                     'bearish': bearish_count,
-                    'neutral': len(signals) - bullish_count - bearish_count
+                    'neutral': len(codes) - bullish_count - bearish_count
                 },
                 'atr': atr
             }
@@ -200,7 +222,7 @@ class SignalAggregator:
             )
 
         except Exception as e:
-            self.logger.error(f"Signal aggregation error: {e}")
+            self.logger.error("Signal aggregation error: %s", e)
             return AggregatedSignal(
                 signal_type="NEUTRAL",
                 total_score=0.0,
@@ -215,20 +237,69 @@ class SignalAggregator:
                 metrics={}
             )
 
-    def calculate_atr(self, df: pd.DataFrame, period: int = 14) -> float:
-        """Calculate Average True Range"""
+    @staticmethod
+    def _bar_key(arrs: OHLCVArrays) -> Tuple:
+        """State M1 terakhir: waktu dan isi bar terakhir plus jumlah bar"""
+        volume = arrs.tick_volume[-1] if arrs.tick_volume is not None else 0
+        return (int(arrs.ts[-1].astype('datetime64[ms]').astype(np.int64)), len(arrs),
+                float(arrs.close[-1]), int(volume))
+
+    @staticmethod
+    def _spread_key(arrs: OHLCVArrays) -> Tuple:
+        """Spread bar terakhir, ikut berubah selama bar terbentuk (untuk micro)"""
+        return (int(arrs.spread[-1]) if arrs.spread is not None else None,)
+
+    def _run_analyzers(self, calls: List) -> Dict:
+        """Submit (name, method, args, key) ke pool dan kumpulkan hasilnya per name
+        Hasil dengan (name, key) yang sudah ada di _sig_cache dipakai ulang tanpa
+        submit. Analyzer yang error atau melewati ANALYZER_TIMEOUT menghasilkan
+        None (score 0, tidak di-cache), analyzer lain tetap dipakai. Analyzer yang
+        task timeout-nya masih jalan dilewati (None) sampai task itu selesai, jadi
+        satu instance tidak pernah jalan paralel dengan dirinya sendiri.
+        """
+        results = {}
+        futures = []
+        for name, method, args, key in calls:
+            cached = self._sig_cache.get((name, key))
+            if cached is not None:
+                self._sig_cache.move_to_end((name, key))
+                results[name] = cached
+                continue
+            pending = self._inflight.get(name)
+            if pending is not None:
+                if not pending.done():
+                    self.logger.warning("Analyzer %s still running from a previous cycle, skipped", name)
+                    results[name] = None
+                    continue
+                # Hasil lama untuk bar sebelumnya, dibuang
+                del self._inflight[name]
+            futures.append((name, key, self._pool.submit(method, *args)))
+        # Satu deadline untuk semua analyzer, bukan ANALYZER_TIMEOUT per future berurutan
+        deadline = time.monotonic() + self.ANALYZER_TIMEOUT
+        for name, key, future in futures:
+            try:
+                results[name] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                self.logger.error("Analyzer %s timed out after %ss", name, self.ANALYZER_TIMEOUT)
+                self._inflight[name] = future
+                results[name] = None
+            except Exception as e:
+                self.logger.error("Analyzer %s error: %s", name, e)
+                results[name] = None
+            if results[name] is not None:
+                self._sig_cache[(name, key)] = results[name]
+                if len(self._sig_cache) > self.SIG_CACHE_SIZE:
+                    self._sig_cache.popitem(last=False)
+        return results
+
+    def shutdown(self):
+        """Stop the analyzer pool"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def calculate_atr(self, df: Union[pd.DataFrame, OHLCVArrays], period: int = 14) -> float:
+        """Calculate Average True Range (simple mean of the last `period` TRs)"""
         try:
-            high = df['high']
-            low = df['low']
-            close = df['close']
-            
-            tr1 = high - low
-            tr2 = abs(high - close.shift())
-            tr3 = abs(low - close.shift())
-            
-            tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-            atr = tr.rolling(period).mean().iloc[-1]
-            
-            return float(atr)
+            arrs = as_ohlcv_arrays(df)
+            return float(atr_kernel(arrs.high, arrs.low, arrs.close, period))
         except:
             return 5.0  # Default 5 pips if calculation fails
\ No newline at end of file
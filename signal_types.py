@@ -0,0 +1,17 @@
+"""Signal direction codes shared by the analyzers"""
+
+BULLISH = 1
+BEARISH = -1
+NEUTRAL = 0
+
+# Indexed by code + 1
+SIGNAL_LABELS = ("BEARISH", "NEUTRAL", "BULLISH")
+SIGNAL_CODES = {label: code - 1 for code, label in enumerate(SIGNAL_LABELS)}
+
+def signal_label(code: int) -> str:
+    """Map a direction code to its BULLISH/BEARISH/NEUTRAL label"""
+    return SIGNAL_LABELS[code + 1]
+
+def signal_code(label: str) -> int:
+    """Map a BULLISH/BEARISH/NEUTRAL label to its direction code (unknown is 0)"""
+    return SIGNAL_CODES.get(label, NEUTRAL)
@@ -3,12 +3,17 @@ Focuses on institutional trading patterns and volume analysis"""
 
 import pandas as pd
 import numpy as np
-from typing import Dict, Tuple, List
+from typing import Dict, Tuple, List, Union
 from dataclasses import dataclass
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import logging
 
-@dataclass
+from kernels import institutional_candle_kernel, warmup_variants
+from ohlcv_arrays import OHLCVArrays, as_ohlcv_arrays
+from signal_types import signal_label
+
+@dataclass(slots=True)
 class SmartMoneySignal:
     signal_type: str           # BULLISH, BEARISH, NEUTRAL
     strength: float           # 0-30 points
@@ -20,16 +25,33 @@ class SmartMoneySignal:
     metrics: Dict            # Additional metrics
 
 class SmartMoneyAnalyzer:
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, parallelize_inner: bool = True):
+        """parallelize_inner runs the three components on an own 3-worker
+        pool; pass False when the analyzer is already called from a pool
+        (SignalAggregator) to avoid nested pools.
+        """
         self.config = config
         self.logger = logging.getLogger(__name__)
+        self._pool = (ThreadPoolExecutor(max_workers=3, thread_name_prefix="smart-money")
+                      if parallelize_inner else None)
         
         # Constants for analysis
         self.INST_CANDLE_MIN_SIZE = 20  # Minimum pips for institutional candle
         self.VOL_PROFILE_BINS = 20      # Number of bins for volume profile
         self.PRESSURE_THRESHOLD = 0.65   # Threshold for buy/sell pressure
+        self.INST_AVG_WINDOW = 20       # Rolling average window for candle size/volume
+        self.INST_LOOKBACK = 3          # Bars checked for institutional candles
+
+        self._warmup_kernels()
 
-    def find_institutional_candles(self, df: pd.DataFrame) -> Tuple[float, str, Dict]:
+    def _warmup_kernels(self):
+        """Compile the numba kernels at startup instead of in the trading loop"""
+        for volume_dtype in (np.uint64, np.float64):
+            for dummy, volume in zip(warmup_variants(np.ones(3)),
+                                     warmup_variants(np.ones(3, dtype=volume_dtype))):
+                institutional_candle_kernel(dummy, dummy, dummy, dummy, volume, 2, 2)
+
+    def find_institutional_candles(self, arrs: OHLCVArrays) -> Tuple[float, str, Dict]:
         """Analyze institutional candle patterns (15 points max)
         Looks for:
         - Large engulfing candles (order blocks)
@@ -37,59 +59,37 @@ class SmartMoneyAnalyzer:
         - Clean rejection from levels
         """
         try:
-            if len(df) < 20:
+            if len(arrs) < 20:
                 return 0.0, "NEUTRAL", {}
 
-            score = 0.0
-            signal = "NEUTRAL"
-            metrics = {}
-
-            # Calculate candle sizes and averages
-            body_sizes = abs(df['close'] - df['open'])
-            shadows = df['high'] - df['low']
-            avg_body = body_sizes.rolling(20).mean()
-            avg_shadow = shadows.rolling(20).mean()
-            volume = df['tick_volume']
-            avg_volume = volume.rolling(20).mean()
-
-            # Look for institutional candles in last 3 bars
-            for i in range(-3, 0):
-                candle = df.iloc[i]
-                
-                # 1. Large body relative to average (4 points)
-                if body_sizes.iloc[i] > 2 * avg_body.iloc[i]:
-                    score += 4
-                    
-                # 2. High volume confirmation (3 points)
-                if volume.iloc[i] > 1.5 * avg_volume.iloc[i]:
-                    score += 3
-                    
-                # 3. Clean rejection with small shadow (3 points)
-                if shadows.iloc[i] < 1.2 * body_sizes.iloc[i]:
-                    score += 3
-                    
-                # Determine direction
-                if score > 0:
-                    if candle['close'] > candle['open']:
-                        signal = "BULLISH"
-                    else:
-                        signal = "BEARISH"
+            # Look for institutional candles in last 3 bars, rolling body and
+            # volume averages and scoring fused in one kernel pass
+            score, code, last_body, avg_body, last_volume, avg_volume = institutional_candle_kernel(
+                arrs.open,
+                arrs.high,
+                arrs.low,
+                arrs.close,
+                arrs.tick_volume,
+                self.INST_AVG_WINDOW,
+                self.INST_LOOKBACK
+            )
+            signal = signal_label(code)
 
             # Record metrics
             metrics = {
-                'last_body_size': float(body_sizes.iloc[-1]),
-                'avg_body_size': float(avg_body.iloc[-1]),
-                'last_volume': float(volume.iloc[-1]),
-                'avg_volume': float(avg_volume.iloc[-1])
+                'last_body_size': float(last_body),
+                'avg_body_size': float(avg_body),
+                'last_volume': float(last_volume),
+                'avg_volume': float(avg_volume)
             }
 
             return min(15.0, score), signal, metrics
 
         except Exception as e:
-            self.logger.error(f"Institutional candle analysis error: {e}")
+            self.logger.error("Institutional candle analysis error: %s", e)
             return 0.0, "NEUTRAL", {}
 
-    def analyze_volume_profile(self, df: pd.DataFrame) -> Tuple[float, str, Dict]:
+    def analyze_volume_profile(self, arrs: OHLCVArrays) -> Tuple[float, str, Dict]:
         """Volume profile analysis (10 points max)
         Analyzes:
         - Volume nodes (high volume areas)
@@ -97,39 +97,40 @@ class SmartMoneyAnalyzer:
         - Volume delta at key levels
         """
         try:
-            if len(df) < 50:
+            if len(arrs) < 50:
                 return 0.0, "NEUTRAL", {}
 
             score = 0.0
             signal = "NEUTRAL"
             metrics = {}
 
-            # Create volume profile
-            price_range = df['high'].max() - df['low'].min()
-            bin_size = price_range / self.VOL_PROFILE_BINS
-            
-            df['price_bin'] = pd.cut(df['close'], 
-                                   bins=self.VOL_PROFILE_BINS,
-                                   labels=False)
+            # Create volume profile: close binned as pd.cut(bins=VOL_PROFILE_BINS)
+            # does, equal-width bins over the close range, right edge inclusive
+            close = arrs.close
+            lo, hi = close.min(), close.max()
+            edges = np.linspace(lo, hi, self.VOL_PROFILE_BINS + 1)
+            edges[0] -= (hi - lo) * 0.001
+            bins = np.clip(np.searchsorted(edges, close, side='left') - 1,
+                           0, self.VOL_PROFILE_BINS - 1)
             
-            volume_profile = df.groupby('price_bin')['tick_volume'].sum()
+            volume_profile = np.bincount(bins, weights=arrs.tick_volume,
+                                         minlength=self.VOL_PROFILE_BINS)
+            occupied = np.bincount(bins, minlength=self.VOL_PROFILE_BINS) > 0
             
-            # Find high volume nodes
-            mean_vol = volume_profile.mean()
-            std_vol = volume_profile.std()
+            # Find high volume nodes, stats over the bins holding any bar
+            mean_vol = volume_profile[occupied].mean()
+            std_vol = volume_profile[occupied].std(ddof=1)
             
-            high_vol_nodes = volume_profile[volume_profile > mean_vol + std_vol]
-            current_bin = pd.cut([df['close'].iloc[-1]], 
-                               bins=self.VOL_PROFILE_BINS,
-                               labels=False)[0]
+            high_vol_nodes = np.flatnonzero(occupied & (volume_profile > mean_vol + std_vol))
+            current_bin = bins[-1]
 
             # Score based on current price position
-            if current_bin in high_vol_nodes.index:
+            if current_bin in high_vol_nodes:
                 score += 5  # At high volume node
                 
                 # Check if accepting or rejecting
-                recent_close = df['close'].iloc[-1]
-                recent_open = df['open'].iloc[-1]
+                recent_close = close[-1]
+                recent_open = arrs.open[-1]
                 
                 if recent_close > recent_open:  # Bullish at node
                     score += 5
@@ -139,7 +140,7 @@ class SmartMoneyAnalyzer:
                     signal = "BEARISH"
 
             metrics = {
-                'high_vol_nodes': list(high_vol_nodes.index),
+                'high_vol_nodes': high_vol_nodes.tolist(),
                 'current_bin': int(current_bin),
                 'mean_volume': float(mean_vol)
             }
@@ -147,10 +148,10 @@ class SmartMoneyAnalyzer:
             return min(10.0, score), signal, metrics
 
         except Exception as e:
-            self.logger.error(f"Volume profile analysis error: {e}")
+            self.logger.error("Volume profile analysis error: %s", e)
             return 0.0, "NEUTRAL", {}
 
-    def analyze_pressure(self, df: pd.DataFrame) -> Tuple[float, str, Dict]:
+    def analyze_pressure(self, arrs: OHLCVArrays) -> Tuple[float, str, Dict]:
         """Buy/sell pressure estimation (5 points max)
         Analyzes:
         - Delta volume (buy vs sell volume)
@@ -158,16 +159,17 @@ class SmartMoneyAnalyzer:
         - Cumulative volume delta
         """
         try:
-            if len(df) < 20:
+            if len(arrs) < 20:
                 return 0.0, "NEUTRAL", {}
 
             score = 0.0
             signal = "NEUTRAL"
             metrics = {}
 
-            # Calculate buying vs selling pressure
-            buying_volume = df[df['close'] > df['open']]['tick_volume'].sum()
-            selling_volume = df[df['close'] < df['open']]['tick_volume'].sum()
+            # Calculate buying vs selling pressure, masked sums over the raw arrays
+            volume = arrs.tick_volume
+            buying_volume = np.where(arrs.close > arrs.open, volume, 0).sum()
+            selling_volume = np.where(arrs.close < arrs.open, volume, 0).sum()
             total_volume = buying_volume + selling_volume
 
             if total_volume > 0:
@@ -190,16 +192,29 @@ class SmartMoneyAnalyzer:
             return min(5.0, score), signal, metrics
 
         except Exception as e:
-            self.logger.error(f"Pressure analysis error: {e}")
+            self.logger.error("Pressure analysis error: %s", e)
             return 0.0, "NEUTRAL", {}
 
-    def get_smart_money_signal(self, df: pd.DataFrame) -> SmartMoneySignal:
+    def get_smart_money_signal(self, df: Union[pd.DataFrame, OHLCVArrays]) -> SmartMoneySignal:
         """Aggregate all smart money analysis components"""
         try:
+            # Extract the columns once for the three components
+            arrs = as_ohlcv_arrays(df)
+            
             # Get component scores
-            inst_score, inst_signal, inst_metrics = self.find_institutional_candles(df)
-            vol_score, vol_signal, vol_metrics = self.analyze_volume_profile(df)
-            pressure_score, pressure_signal, pressure_metrics = self.analyze_pressure(df)
+            if self._pool is not None:
+                futures = [
+                    self._pool.submit(self.find_institutional_candles, arrs),
+                    self._pool.submit(self.analyze_volume_profile, arrs),
+                    self._pool.submit(self.analyze_pressure, arrs)
+                ]
+                (inst_score, inst_signal, inst_metrics), \
+                    (vol_score, vol_signal, vol_metrics), \
+                    (pressure_score, pressure_signal, pressure_metrics) = [f.result() for f in futures]
+            else:
+                inst_score, inst_signal, inst_metrics = self.find_institutional_candles(arrs)
+                vol_score, vol_signal, vol_metrics = self.analyze_volume_profile(arrs)
+                pressure_score, pressure_signal, pressure_metrics = self.analyze_pressure(arrs)
 
             # Calculate total score
             total_score = inst_score + vol_score + pressure_score
@@ -244,7 +259,7 @@ class SmartMoneyAnalyzer:
             )
 
         except Exception as e:
-            self.logger.error(f"Smart money signal error: {e}")
+            self.logger.error("Smart money signal error: %s", e)
             return SmartMoneySignal(
                 signal_type="NEUTRAL",
                 strength=0.0,
@@ -1,24 +1,33 @@
 """Statistical Analysis Module"""
 import pandas as pd
-from typing import Dict
+from typing import Dict, Union
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 import logging
 import numpy as np
 
+from ohlcv_arrays import OHLCVArrays, as_ohlcv_arrays
+from kernels import return_stats_kernel, warmup_variants
+
+@dataclass(slots=True)
 class StatisticalSignal:
-    def __init__(self):
-        self.signal_type = "NEUTRAL"
-        self.strength = 0.0  # 0-20 points
-        self.timestamp = datetime.now(timezone.utc)
-        self.levels = {}
-        self.metrics = {}
+    signal_type: str = "NEUTRAL"
+    strength: float = 0.0  # 0-20 points
+    timestamp: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    levels: Dict = field(default_factory=dict)
+    metrics: Dict = field(default_factory=dict)
 
 class StatisticalAnalyzer:
     def __init__(self, config: Dict):
         self.config = config
         self.logger = logging.getLogger(__name__)
+        
+        # Compile the return stats kernel at startup instead of in the trading loop
+        for dtype in (np.float64, np.float32):
+            for dummy in warmup_variants(np.ones(3, dtype=dtype)):
+                return_stats_kernel(dummy)
 
-    def get_statistical_signal(self, df: pd.DataFrame) -> StatisticalSignal:
+    def get_statistical_signal(self, df: Union[pd.DataFrame, OHLCVArrays]) -> StatisticalSignal:
         """Analyze statistical patterns"""
         try:
             signal = StatisticalSignal()
@@ -26,10 +35,8 @@ class StatisticalAnalyzer:
             if len(df) < 20:
                 return signal
 
-            # Calculate basic statistics
-            returns = df['close'].pct_change()
-            std_dev = returns.std()
-            current_return = returns.iloc[-1]
+            # Calculate basic statistics in one pass over the closes
+            std_dev, current_return = return_stats_kernel(as_ohlcv_arrays(df).close)
             
             # Detect statistical anomalies
             if abs(current_return) > 2 * std_dev:
@@ -43,5 +50,5 @@ class StatisticalAnalyzer:
             return signal
 
         except Exception as e:
-            self.logger.error(f"Statistical analysis error: {e}")
+            self.logger.error("Statistical analysis error: %s", e)
             return StatisticalSignal()
\ No newline at end of file
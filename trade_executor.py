@@ -4,8 +4,10 @@ import MetaTrader5 as mt5
 from typing import Dict, List
 import logging
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 # Import AggregatedSignal dari signal_aggregator
 from signal_aggregator import AggregatedSignal
+from data_handler import ttl_cache
 
 class TradeExecutor:
     def __init__(self, config: Dict):
@@ -17,6 +19,20 @@ class TradeExecutor:
         self.max_volume = config['trading']['max_volume']
         self.slippage = config['trading']['slippage']
         self.logger = logging.getLogger(__name__)
+        # (monotonic_ts, value) per cached MT5 lookup, see ttl_cache
+        self._ttl_cache = {}
+        # Independent order requests of one signal are sent concurrently
+        self._order_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="orders")
+
+    @ttl_cache(seconds=0.1)
+    def _symbol_info(self):
+        """mt5.symbol_info for the traded symbol, shared by one trade's checks"""
+        return mt5.symbol_info(self.symbol)
+
+    @ttl_cache(seconds=1.0)
+    def _account_info(self):
+        """mt5.account_info, balance only moves when trades close"""
+        return mt5.account_info()
 
     def calculate_position_size(self, 
                               entry_price: float, 
@@ -28,7 +44,7 @@ class TradeExecutor:
                 return self.min_volume
 
             # Get account info
-            account_info = mt5.account_info()
+            account_info = self._account_info()
             if not account_info:
                 raise ValueError("Could not get account info")
 
@@ -43,7 +59,7 @@ class TradeExecutor:
                 return self.min_volume
 
             # Get symbol info
-            symbol_info = mt5.symbol_info(self.symbol)
+            symbol_info = self._symbol_info()
             if not symbol_info:
                 raise ValueError(f"Could not get {self.symbol} info")
 
@@ -75,7 +91,7 @@ class TradeExecutor:
                 }
 
             # Check spread
-            symbol_info = mt5.symbol_info(self.symbol)
+            symbol_info = self._symbol_info()
             if not symbol_info:
                 return {
                     'success': False,
@@ -152,11 +168,65 @@ class TradeExecutor:
                 'message': f"Execution error: {str(e)}"
             }
 
+    def _send_orders(self, requests: List[Dict]) -> List:
+        """order_send all requests at once, results in request order
+        Every send is waited for: an order already handed to the terminal
+        can't be cancelled, so a slow one must not be taken as failed.
+        A request that raises gives None.
+        """
+        futures = [self._order_pool.submit(mt5.order_send, request) for request in requests]
+        results = []
+        for request, future in zip(requests, futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                self.logger.error(f"Order send error ({request['comment']}): {e}")
+                result = None
+            if result is not None:
+                self.logger.info(f"Order {request['comment']}: retcode {result.retcode}")
+            results.append(result)
+        return results
+
+    @staticmethod
+    def _order_done(result) -> bool:
+        return result is not None and result.retcode == mt5.TRADE_RETCODE_DONE
+
+    def _close_position(self, ticket: int):
+        """Close the whole position `ticket` at market, logging the retcode"""
+        position = mt5.positions_get(ticket=ticket)
+        if not position:
+            self.logger.warning(f"Position {ticket} not found, nothing to close")
+            return
+        position = position[0]
+        tick = mt5.symbol_info_tick(self.symbol)
+        is_buy = position.type == mt5.POSITION_TYPE_BUY
+        result = mt5.order_send({
+            "action": mt5.TRADE_ACTION_DEAL,
+            "symbol": self.symbol,
+            "volume": position.volume,
+            "type": mt5.ORDER_TYPE_SELL if is_buy else mt5.ORDER_TYPE_BUY,
+            "position": ticket,
+            "price": tick.bid if is_buy else tick.ask,
+            "deviation": self.slippage,
+            "magic": 123456,
+            "comment": "TP rollback Anti-Sweep",
+            "type_time": mt5.ORDER_TIME_GTC,
+            "type_filling": mt5.ORDER_FILLING_FOK,
+        })
+        if self._order_done(result):
+            self.logger.info(f"Position {ticket} closed: retcode {result.retcode}")
+        else:
+            self.logger.error(f"Position {ticket} close failed: retcode {getattr(result, 'retcode', None)}")
+
     def modify_position_for_multiple_tps(self, 
                                        order_id: int, 
                                        tp_levels: List[float],
                                        original_volume: float):
-        """Modify position for multiple take profits"""
+        """Modify position for multiple take profits
+        The TP1 modification and the TP2/TP3 orders are sent together. If
+        any of them fails the split is undone: the TP2/TP3 positions that
+        were opened are closed and a modified TP is restored.
+        """
         try:
             position = mt5.positions_get(ticket=order_id)
             if not position:
@@ -172,20 +242,19 @@ class TradeExecutor:
             ]
 
             # Modify main position for TP1
-            request = {
+            requests = [{
                 "action": mt5.TRADE_ACTION_SLTP,
                 "position": order_id,
                 "symbol": self.symbol,
                 "sl": position.sl,
                 "tp": tp_levels[0],
-                "magic": 123456
-            }
-            
-            mt5.order_send(request)
+                "magic": 123456,
+                "comment": "TP1 Anti-Sweep"
+            }]
 
             # Create additional orders for TP2 and TP3
             for i, (tp, vol) in enumerate(zip(tp_levels[1:], volumes[1:]), 1):
-                request = {
+                requests.append({
                     "action": mt5.TRADE_ACTION_DEAL,
                     "symbol": self.symbol,
                     "volume": vol,
@@ -198,9 +267,27 @@ class TradeExecutor:
                     "comment": f"TP{i+1} Anti-Sweep",
                     "type_time": mt5.ORDER_TIME_GTC,
                     "type_filling": mt5.ORDER_FILLING_FOK,
-                }
-                
-                mt5.order_send(request)
+                })
+
+            sltp_result, *tp_results = self._send_orders(requests)
+            if self._order_done(sltp_result) and all(self._order_done(r) for r in tp_results):
+                return
+            
+            # Split incomplete: undo every part that went through
+            self.logger.warning("Multiple TP orders incomplete, rolling back the split")
+            for result in tp_results:
+                if self._order_done(result):
+                    self._close_position(result.order)
+            if self._order_done(sltp_result):
+                restore = mt5.order_send({**requests[0], "tp": position.tp, "comment": "TP restore Anti-Sweep"})
+                if self._order_done(restore):
+                    self.logger.info(f"Position {order_id} TP restored: retcode {restore.retcode}")
+                else:
+                    self.logger.error(f"Position {order_id} TP restore failed: retcode {getattr(restore, 'retcode', None)}")
 
         except Exception as e:
-            self.logger.error(f"Multiple TP modification error: {e}")
\ No newline at end of file
+            self.logger.error(f"Multiple TP modification error: {e}")
+
+    def shutdown(self):
+        """Stop the order pool, letting orders already sent finish"""
+        self._order_pool.shutdown(wait=True)
\ No newline at end of file
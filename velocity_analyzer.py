@@ -1,45 +1,153 @@
 """Market Velocity Analysis Module"""
 import pandas as pd
-from typing import Dict
+import numpy as np
+from typing import Dict, List, Optional, Tuple, Union
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 import logging
+import time
 
+from ohlcv_arrays import OHLCVArrays, as_ohlcv_arrays, column_array
+from signal_types import BULLISH, BEARISH, NEUTRAL, signal_label
+
+@dataclass(slots=True)
 class VelocitySignal:
-    def __init__(self):
-        self.signal_type = "NEUTRAL"
-        self.strength = 0.0  # 0-25 points
-        self.timestamp = datetime.now(timezone.utc)
-        self.levels = {}
-        self.metrics = {}
+    signal_type: str = "NEUTRAL"
+    strength: float = 0.0  # 0-25 points
+    # Created on first write, see _ensure_levels / _ensure_metrics
+    levels: Optional[Dict] = None
+    metrics: Optional[Dict] = None
+    _created_ns: int = field(default_factory=time.time_ns, repr=False)
+    _timestamp: Optional[datetime] = field(default=None, repr=False)
+
+    @property
+    def timestamp(self) -> datetime:
+        """Creation time (UTC), built from the integer clock on first read"""
+        if self._timestamp is None:
+            self._timestamp = datetime.fromtimestamp(self._created_ns / 1e9, tz=timezone.utc)
+        return self._timestamp
+
+    @timestamp.setter
+    def timestamp(self, value: datetime):
+        self._timestamp = value
+
+    def _ensure_levels(self) -> Dict:
+        if self.levels is None:
+            self.levels = {}
+        return self.levels
+
+    def _ensure_metrics(self) -> Dict:
+        if self.metrics is None:
+            self.metrics = {}
+        return self.metrics
+
+# Returned for frames too short (or without closes) to analyze; shared, so
+# callers must not modify it
+NEUTRAL_VELOCITY_SIGNAL = VelocitySignal()
 
 class VelocityAnalyzer:
     def __init__(self, config: Dict):
         self.config = config
         self.logger = logging.getLogger(__name__)
+        # (df, bar count, last close, signal) of the previous call; the frame
+        # is held so its id can't be reused by another one
+        self._last = None
+
+    def get_velocity_signal(self, df: Union[pd.DataFrame, OHLCVArrays]) -> VelocitySignal:
+        """Analyze market velocity
+        Short or close-less frames give a neutral signal; any other error
+        propagates to the caller (the aggregator logs it and scores 0).
+        Calling again with the same frame and an unchanged last bar returns
+        the previous signal object.
+        """
+        if isinstance(df, OHLCVArrays):
+            close = df.close
+        elif 'close' in df.columns:
+            close = column_array(df, 'close')
+        else:
+            return NEUTRAL_VELOCITY_SIGNAL
+        if len(close) == 0:
+            return NEUTRAL_VELOCITY_SIGNAL
+        
+        last = self._last
+        if last is not None and last[0] is df and last[1] == len(close) and last[2] == close[-1]:
+            return last[3]
+        signal = self.get_velocity_signal_np(close)
+        self._last = (df, len(close), close[-1], signal)
+        return signal
+
+    def get_velocity_signal_np(self, close: np.ndarray) -> VelocitySignal:
+        """Analyze market velocity from a close price array, no pandas"""
+        if len(close) < 20:
+            return NEUTRAL_VELOCITY_SIGNAL
+        signal = VelocitySignal()
+
+        # Calculate price velocity (5-bar mean of the changes) for the last
+        # two bars only; each mean telescopes to an endpoint difference, so
+        # four closes are all that is read (no array, no kernel call)
+        velocity = (float(close[-1]) - float(close[-6])) / 5
+        acceleration = velocity - (float(close[-2]) - float(close[-7])) / 5
+        
+        # Generate signal based on velocity and acceleration, without branches:
+        # the direction code indexes the label table
+        bull = int(velocity > 0) & int(acceleration > 0)
+        bear = int(velocity < 0) & int(acceleration < 0)
+        signal.signal_type = signal_label(bull - bear)
+        signal.strength = 20.0 * (bull | bear)
+        
+        return signal
+
+    def get_velocity_signal_batch(self, df: Union[pd.DataFrame, OHLCVArrays]) -> Tuple[np.ndarray, np.ndarray]:
+        """Velocity signal of every bar, as get_velocity_signal would give
+        on the frame cut after that bar, in one vectorized pass
+        Returns (signal codes (int8, see signal_types), strengths)
+        """
+        close = as_ohlcv_arrays(df).close
+        n = len(close)
+        codes = np.full(n, NEUTRAL, dtype=np.int8)
+        strengths = np.zeros(n)
+        if n < 20:
+            return codes, strengths
+
+        # velocity[k] / acceleration[k] belong to bar k + 5 / k + 6; the mean
+        # of 5 changes telescopes to (close[k + 5] - close[k]) / 5
+        velocity = (close[5:] - close[:-5]) / 5
+        acceleration = np.diff(velocity)
+        velocity = velocity[1:]
+        bullish = (velocity > 0) & (acceleration > 0)
+        bearish = (velocity < 0) & (acceleration < 0)
+        codes[6:] = np.where(bullish, BULLISH, np.where(bearish, BEARISH, NEUTRAL))
+        strengths[6:] = np.where(bullish | bearish, 20.0, 0.0)
+
+        # Bars with fewer than 20 bars of history stay neutral
+        codes[:19] = NEUTRAL
+        strengths[:19] = 0.0
+        return codes, strengths
+
+    def get_velocity_signals_multi(self, dfs: List[Union[pd.DataFrame, OHLCVArrays]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Last-bar velocity signal of each of several symbols' frames at once,
+        as get_velocity_signal would give on each
+        Returns (signal codes (int8, see signal_types), strengths), one per frame
+        """
+        codes = np.full(len(dfs), NEUTRAL, dtype=np.int8)
+        strengths = np.zeros(len(dfs))
+        # Frames too short (or without closes) stay neutral
+        closes = [
+            df.close if isinstance(df, OHLCVArrays)
+            else column_array(df, 'close') if 'close' in df.columns
+            else np.empty(0)
+            for df in dfs
+        ]
+        rows = [i for i, close in enumerate(closes) if len(close) >= 20]
+        if not rows:
+            return codes, strengths
 
-    def get_velocity_signal(self, df: pd.DataFrame) -> VelocitySignal:
-        """Analyze market velocity"""
-        try:
-            signal = VelocitySignal()
-            
-            if len(df) < 20:
-                return signal
-
-            # Calculate price velocity
-            price_changes = df['close'].diff()
-            velocity = price_changes.rolling(5).mean()
-            acceleration = velocity.diff()
-            
-            # Generate signal based on velocity and acceleration
-            if velocity.iloc[-1] > 0 and acceleration.iloc[-1] > 0:
-                signal.signal_type = "BULLISH"
-                signal.strength = 20.0
-            elif velocity.iloc[-1] < 0 and acceleration.iloc[-1] < 0:
-                signal.signal_type = "BEARISH"
-                signal.strength = 20.0
-            
-            return signal
-
-        except Exception as e:
-            self.logger.error(f"Velocity analysis error: {e}")
-            return VelocitySignal()
\ No newline at end of file
+        # Last 7 closes of every analyzable frame, shape (symbols, 7)
+        tails = np.stack([closes[i][-7:] for i in rows]).astype(np.float64, copy=False)
+        velocity = (tails[:, -1] - tails[:, -6]) / 5
+        acceleration = velocity - (tails[:, -2] - tails[:, -7]) / 5
+        bullish = (velocity > 0) & (acceleration > 0)
+        bearish = (velocity < 0) & (acceleration < 0)
+        codes[rows] = np.where(bullish, BULLISH, np.where(bearish, BEARISH, NEUTRAL))
+        strengths[rows] = np.where(bullish | bearish, 20.0, 0.0)
+        return codes, strengths
\ No newline at end of file
@@ -1,45 +1,104 @@
 """Volume Analysis Module"""
 import pandas as pd
-from typing import Dict
+import numpy as np
+from typing import Dict, Optional, Union
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 import logging
+import time
 
+from kernels import volume_spike_kernel, warmup_variants
+from ohlcv_arrays import OHLCVArrays, column_array
+from signal_types import signal_label
+
+@dataclass(slots=True)
 class VolumeSignal:
-    def __init__(self):
-        self.signal_type = "NEUTRAL"
-        self.strength = 0.0  # 0-20 points
-        self.timestamp = datetime.now(timezone.utc)
-        self.levels = {}
-        self.metrics = {}
+    signal_type: str = "NEUTRAL"
+    strength: float = 0.0  # 0-20 points
+    # Created on first write, see _ensure_levels / _ensure_metrics
+    levels: Optional[Dict] = None
+    metrics: Optional[Dict] = None
+    _created_ns: int = field(default_factory=time.time_ns, repr=False)
+    _timestamp: Optional[datetime] = field(default=None, repr=False)
+
+    @property
+    def timestamp(self) -> datetime:
+        """Creation time (UTC), built from the integer clock on first read"""
+        if self._timestamp is None:
+            self._timestamp = datetime.fromtimestamp(self._created_ns / 1e9, tz=timezone.utc)
+        return self._timestamp
+
+    @timestamp.setter
+    def timestamp(self, value: datetime):
+        self._timestamp = value
+
+    def _ensure_levels(self) -> Dict:
+        if self.levels is None:
+            self.levels = {}
+        return self.levels
+
+    def _ensure_metrics(self) -> Dict:
+        if self.metrics is None:
+            self.metrics = {}
+        return self.metrics
+
+# Returned for frames too short (or without volume) to analyze; shared, so
+# callers must not modify it
+NEUTRAL_VOLUME_SIGNAL = VolumeSignal()
 
 class VolumeAnalyzer:
     def __init__(self, config: Dict):
         self.config = config
         self.logger = logging.getLogger(__name__)
+        self._required_cols = ('open', 'close', 'tick_volume')
+        # (df, bar count, last close, last volume, signal) of the previous
+        # call; the frame is held so its id can't be reused by another one
+        self._last = None
+        # Compile the volume kernel at startup instead of in the trading loop
+        for dummy in warmup_variants(np.ones(20, dtype=np.int64)):
+            volume_spike_kernel(dummy, 20)
+
+    def get_volume_signal(self, df: Union[pd.DataFrame, OHLCVArrays]) -> VolumeSignal:
+        """Analyze volume patterns
+        Short frames or frames without volume give a neutral signal; any
+        other error propagates to the caller (the aggregator logs it and
+        scores 0). Calling again with the same frame and an unchanged last
+        bar returns the previous signal object.
+        """
+        if isinstance(df, OHLCVArrays):
+            if df.tick_volume is None:
+                return NEUTRAL_VOLUME_SIGNAL
+            close, open_, tick_volume = df.close, df.open, df.tick_volume
+        elif set(self._required_cols).issubset(df.columns):
+            close, open_, tick_volume = (column_array(df, col) for col in ('close', 'open', 'tick_volume'))
+        else:
+            return NEUTRAL_VOLUME_SIGNAL
+        if len(close) == 0:
+            return NEUTRAL_VOLUME_SIGNAL
+        
+        last = self._last
+        if (last is not None and last[0] is df and last[1] == len(close)
+                and last[2] == close[-1] and last[3] == tick_volume[-1]):
+            return last[4]
+        signal = self.get_volume_signal_np(close, open_, tick_volume)
+        self._last = (df, len(close), close[-1], tick_volume[-1], signal)
+        return signal
+
+    def get_volume_signal_np(self, close: np.ndarray, open_: np.ndarray,
+                             tick_volume: np.ndarray) -> VolumeSignal:
+        """Analyze volume patterns from price and tick volume arrays, no pandas"""
+        if len(close) < 20:
+            return NEUTRAL_VOLUME_SIGNAL
+        signal = VolumeSignal()
 
-    def get_volume_signal(self, df: pd.DataFrame) -> VolumeSignal:
-        """Analyze volume patterns"""
-        try:
-            signal = VolumeSignal()
-            
-            if len(df) < 20:
-                return signal
-
-            # Calculate average volume
-            avg_volume = df['tick_volume'].rolling(20).mean()
-            current_volume = df['tick_volume'].iloc[-1]
-            
-            # Volume spike detection
-            if current_volume > 1.5 * avg_volume.iloc[-1]:
-                if df['close'].iloc[-1] > df['open'].iloc[-1]:
-                    signal.signal_type = "BULLISH"
-                    signal.strength = 15.0
-                else:
-                    signal.signal_type = "BEARISH"
-                    signal.strength = 15.0
-            
-            return signal
-
-        except Exception as e:
-            self.logger.error(f"Volume analysis error: {e}")
-            return VolumeSignal()
\ No newline at end of file
+        # Volume spike against the 20-bar average, tested on integer volumes
+        volume = np.ascontiguousarray(tick_volume[-20:], dtype=np.int64)
+        
+        # Volume spike detection, direction from the last candle (a doji
+        # counts as bearish); selected without branches
+        spike = int(volume_spike_kernel(volume, 20))
+        up = int(close[-1] > open_[-1])
+        signal.signal_type = signal_label(spike * (2 * up - 1))
+        signal.strength = 15.0 * spike
+        
+        return signal
\ No newline at end of file